@@ -1,56 +1,313 @@
+import io
 import os
-import csv
+import gzip
+import json
+import hashlib
+import shutil
+import logging
 from datetime import datetime, timedelta
 from sqlalchemy import text
-from inventory_backend.database import engine
+from inventory_backend.database import get_read_engine, run_on_shared_snapshot
+from inventory_backend.sql_instrumentation import instrumented_job
+from inventory_backend.dashboard.parquet_export import export_parquet
 import pytz
 
-def run_backup():
-    print("Starting backup...")
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# none, gzip or zstd (zstd needs the zstandard package); applied while streaming, never in memory
+BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "gzip").lower()
+BACKUP_COMPRESSION_LEVEL = int(os.getenv("BACKUP_COMPRESSION_LEVEL", "3"))
+
+BACKUP_ROOT = os.path.abspath(os.getenv("BACKUP_DIR") or os.path.join(os.path.dirname(__file__), "..", "backups"))
+# A full base is taken when the newest one is this old (and on the last day of each month); deltas in between
+BACKUP_FULL_EVERY_DAYS = int(os.getenv("BACKUP_FULL_EVERY_DAYS", "7"))
+# Sets older than this are pruned, except month-end fulls (kept BACKUP_RETAIN_MONTHLY months) and
+# the base of any delta still kept
+BACKUP_RETAIN_DAYS = int(os.getenv("BACKUP_RETAIN_DAYS", "35"))
+BACKUP_RETAIN_MONTHLY = int(os.getenv("BACKUP_RETAIN_MONTHLY", "12"))
+# Deltas start this far before the previous set, to catch rows committed while it was running
+BACKUP_DELTA_OVERLAP_MINUTES = int(os.getenv("BACKUP_DELTA_OVERLAP_MINUTES", "10"))
+
+# Also write a typed Parquet copy of each full/delta dump for analytics (needs pyarrow)
+BACKUP_PARQUET = os.getenv("BACKUP_PARQUET", "0") == "1"
+
+# Worker connections dumping tables at once, all on one exported snapshot
+BACKUP_PARALLELISM = int(os.getenv("BACKUP_PARALLELISM", "4"))
+
+# Table -> key column. Each has an updated_at change timestamp (migration 0006), so deltas apply.
+# Tables outside public are schema-qualified, here and in file names and manifests.
+BACKUP_TABLES = {
+    "inventory_units": "unit_id",
+    "inventory_units_archive": "unit_id",
+    "inventory_log": "log_id",
+    "archive.inventory_log_archive": "log_id",
+    "manual_review": "review_id",
+}
+# Partitions move here from inventory_log with their old updated_at (dashboard/partitions.py), so a
+# delta also takes every partition attached since the previous set, as listed in its manifest
+INVENTORY_LOG_ARCHIVE = "archive.inventory_log_archive"
+# Small or rarely changed tables, dumped whole in every set
+BACKUP_FULL_TABLES = [
+    "products", "master_skus", "brands", "categories", "ssds", "users",
+    "returns", "repairs", "disposals", "reconciled_items", "untracked_serial_sales", "schema_migrations",
+]
+MANIFEST = "manifest.json"
+
+_EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _open_output(path):
+    """Binary file object for `path` with the configured compression; returns (path, file)."""
+    if BACKUP_COMPRESSION not in _EXTENSIONS:
+        raise ValueError(f"Unknown BACKUP_COMPRESSION: {BACKUP_COMPRESSION!r}")
+    path += _EXTENSIONS[BACKUP_COMPRESSION]
+    if BACKUP_COMPRESSION == "gzip":
+        return path, gzip.open(path, "wb", compresslevel=BACKUP_COMPRESSION_LEVEL)
+    if BACKUP_COMPRESSION == "zstd":
+        if zstandard is None:
+            raise RuntimeError("BACKUP_COMPRESSION=zstd requires the zstandard package")
+        compressor = zstandard.ZstdCompressor(level=BACKUP_COMPRESSION_LEVEL, threads=-1)
+        return path, compressor.stream_writer(open(path, "wb"))
+    return path, open(path, "wb")
+
+
+def open_backup_file(path):
+    """Buffered binary reader for a backup file, decompressing by extension."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} needs the zstandard package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")))
+    return open(path, "rb")
+
+
+class _HashingWriter:
+    """Counts and sha256-hashes the uncompressed CSV bytes on their way to the file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self.f.write(data)
+
+
+def copy_to_file(conn, query, path, params=None):
+    """Stream `COPY (query) TO STDOUT` as CSV with a header into path.
+
+    psycopg2 hands each chunk to the file as it arrives, so memory stays flat whatever the table size.
+    Params use psycopg2 style (%(name)s). Returns a manifest entry: file, rows, bytes and sha256
+    (both of the uncompressed CSV).
+    """
+    cursor = conn.connection.cursor()
+    try:
+        if params:
+            query = cursor.mogrify(query, params).decode()
+        path, f = _open_output(path)
+        with f:
+            writer = _HashingWriter(f)
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", writer)
+        return {
+            "file": os.path.basename(path),
+            "rows": cursor.rowcount,
+            "bytes": writer.bytes,
+            "sha256": writer.sha256.hexdigest(),
+        }
+    finally:
+        cursor.close()
+
+
+def list_backup_sets(root=BACKUP_ROOT):
+    """Manifests of completed backup sets, oldest first. Folders without a manifest are ignored."""
+    sets = []
+    if not os.path.isdir(root):
+        return sets
+    for name in os.listdir(root):
+        path = os.path.join(root, name, MANIFEST)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                sets.append(json.load(f))
+    return sorted(sets, key=lambda s: datetime.fromisoformat(s["created_at"]))
+
 
+def has_backup_today():
+    """True when a completed set was already taken today (Los Angeles time)."""
+    today = datetime.now(pytz.timezone("America/Los_Angeles")).date()
+    return any(datetime.fromisoformat(s["created_at"]).date() == today for s in list_backup_sets())
+
+
+def _plan(sets, now, is_month_end):
+    """(type, base set name, delta start) for the next backup."""
+    fulls = [s for s in sets if s["type"] == "full"]
+    if (
+        not fulls or is_month_end
+        or now - datetime.fromisoformat(fulls[-1]["created_at"]) >= timedelta(days=BACKUP_FULL_EVERY_DAYS)
+    ):
+        return "full", None, None
+    since = datetime.fromisoformat(sets[-1]["until"]) - timedelta(minutes=BACKUP_DELTA_OVERLAP_MINUTES)
+    return "incremental", fulls[-1]["name"], since
+
+
+def prune_backups(now, root=BACKUP_ROOT):
+    """Delete sets outside the retention policy; returns the names removed."""
+    sets = list_backup_sets(root)
+    fulls = [s for s in sets if s["type"] == "full"]
+    keep = set()
+    if fulls:
+        # The newest chain is always restorable
+        newest = datetime.fromisoformat(fulls[-1]["created_at"])
+        keep.update(s["name"] for s in sets if datetime.fromisoformat(s["created_at"]) >= newest)
+    for s in sets:
+        age = now - datetime.fromisoformat(s["created_at"])
+        if age <= timedelta(days=BACKUP_RETAIN_DAYS):
+            keep.add(s["name"])
+            if s["base"]:
+                keep.add(s["base"])
+        elif s.get("monthly") and age <= timedelta(days=31 * BACKUP_RETAIN_MONTHLY):
+            keep.add(s["name"])
+
+    removed = []
+    for s in sets:
+        if s["name"] not in keep:
+            shutil.rmtree(os.path.join(root, s["name"]), ignore_errors=True)
+            removed.append(s["name"])
+    if removed:
+        logger.info("Pruned %s backup set(s)", len(removed), extra={"removed": removed})
+    return removed
+
+
+def _table_sizes(conn, tables):
+    """On-disk size of each table (schema-qualified outside public), partitions included."""
+    return dict(conn.execute(text("""
+        SELECT t.name, COALESCE(SUM(pg_total_relation_size(p.relid)), 0)
+        FROM unnest(CAST(:tables AS text[])) AS t(name)
+        CROSS JOIN LATERAL pg_partition_tree(
+            CASE WHEN strpos(t.name, '.') > 0 THEN t.name ELSE 'public.' || t.name END::regclass
+        ) p
+        GROUP BY t.name
+    """), {"tables": list(tables)}).all())
+
+
+def _archive_partitions(conn):
+    return conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+        ORDER BY c.relname
+    """), {"parent": INVENTORY_LOG_ARCHIVE}).scalars().all()
+
+
+def _dump_jobs(kind, since, known_partitions=()):
+    """(table, file stem, manifest kind, query, params) for every file in the set."""
+    jobs = []
+    for table, key in BACKUP_TABLES.items():
+        if kind == "full":
+            jobs.append((table, table, "full", f"SELECT * FROM {table}", None))
+            continue
+        if table == INVENTORY_LOG_ARCHIVE:
+            jobs.append((table, table, "delta", f"""
+                SELECT * FROM {table}
+                WHERE updated_at >= %(since)s
+                   OR tableoid IN (
+                       SELECT c.oid FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                       WHERE i.inhparent = '{table}'::regclass AND c.relname <> ALL(CAST(%(known)s AS text[]))
+                   )
+            """, {"since": since, "known": list(known_partitions)}))
+        else:
+            jobs.append((table, table, "delta", f"SELECT * FROM {table} WHERE updated_at >= %(since)s", {"since": since}))
+        # Current keys, so a restore can drop rows deleted since the base (and knows the final count)
+        jobs.append((table, f"{table}.keys", "keys", f"SELECT {key} FROM {table}", None))
+    for table in BACKUP_FULL_TABLES:
+        jobs.append((table, table, "full", f"SELECT * FROM {table}", None))
+    return jobs
+
+
+def _balance(jobs, sizes, workers):
+    """Split jobs into `workers` groups of similar total size, largest first."""
+    groups = [[] for _ in range(max(1, min(workers, len(jobs))))]
+    totals = [0] * len(groups)
+    for job in sorted(jobs, key=lambda j: sizes.get(j[0], 0), reverse=True):
+        i = totals.index(min(totals))
+        groups[i].append(job)
+        totals[i] += sizes.get(job[0], 0)
+    return groups
+
+
+@instrumented_job("run_backup")
+def run_backup():
     now = datetime.now(pytz.timezone("America/Los_Angeles"))
-    date_str = now.strftime("%Y-%m-%d")
-    month_str = now.strftime("%Y-%m")
     is_month_end = now.month != (now + timedelta(days=1)).month
+    sets = list_backup_sets()
+    kind, base, since = _plan(sets, now, is_month_end)
+    # Older manifests don't list them; treating every archived partition as new is the safe side
+    known_partitions = sets[-1].get("archive_partitions", []) if sets else []
 
-    base_path = os.path.dirname(__file__)
-    backup_dir = os.path.join(base_path, "..", "backups", "monthly", month_str) if is_month_end \
-        else os.path.join(base_path, "..", "backups", date_str)
-    backup_dir = os.path.abspath(backup_dir)
-
+    name = f"{now:%Y-%m-%d_%H%M%S}_{kind}"
+    backup_dir = os.path.join(BACKUP_ROOT, name)
     os.makedirs(backup_dir, exist_ok=True)
+    logger.info("Starting %s backup", kind, extra={"backup_dir": backup_dir, "base": base})
 
     try:
-        with engine.begin() as conn:
-            def write_csv(filename, result):
-                rows = result.fetchall()
-                cols = result.keys()
-                with open(f"{backup_dir}/{filename}", "w", newline='', encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(cols)
-                    writer.writerows(rows)
-
-            # Inventory Units
-            result = conn.execute(text("SELECT * FROM inventory_units"))
-            write_csv("inventory_units.csv", result)
-
-            # Inventory Log
-            if is_month_end:
-                first_day = now.replace(day=1).strftime("%Y-%m-%d")
-                last_day = now.strftime("%Y-%m-%d")
-                result = conn.execute(text("""
-                    SELECT * FROM inventory_log
-                    WHERE event_time BETWEEN :start AND :end
-                """), {"start": first_day, "end": last_day})
-            else:
-                result = conn.execute(text("SELECT * FROM inventory_log"))
-            write_csv("inventory_log.csv", result)
-
-            # Manual Review
-            result = conn.execute(text("SELECT * FROM manual_review"))
-            write_csv("manual_review.csv", result)
-
-        print(f"Backup complete: {backup_dir}")
-        print(f"Backup complete: {os.path.abspath(backup_dir)}")
-    except Exception as e:
-        print("Backup failed:", e)
+        bind = get_read_engine()
+        jobs = _dump_jobs(kind, since, known_partitions)
+        with bind.connect() as conn:
+            sizes = _table_sizes(conn, {job[0] for job in jobs})
+
+        def snapshot_state(conn):
+            return conn.execute(text("SELECT now()")).scalar(), _archive_partitions(conn)
+
+        def dump_group(group):
+            def reader(conn):
+                # Full-table dumps are expected to outlive the API statement timeout
+                conn.execute(text("SET LOCAL statement_timeout = 0"))
+                files = []
+                for table, stem, kind_, query, params in group:
+                    entry = copy_to_file(conn, query, os.path.join(backup_dir, f"{stem}.csv"), params)
+                    if BACKUP_PARQUET and kind_ != "keys":
+                        parquet = export_parquet(conn, query, os.path.join(backup_dir, f"{stem}.parquet"), params)
+                        entry["parquet"] = parquet["file"]
+                    files.append({"table": table, "kind": kind_, **entry})
+                return files
+            return reader
+
+        # Every worker imports the same snapshot, so the set is consistent across tables
+        results = run_on_shared_snapshot(
+            [snapshot_state] + [dump_group(g) for g in _balance(jobs, sizes, BACKUP_PARALLELISM)], bind=bind,
+        )
+        until, archive_partitions = results[0]
+        files = sorted((f for group in results[1:] for f in group), key=lambda f: f["file"])
+
+        manifest = {
+            "name": name,
+            "type": kind,
+            "base": base,
+            "monthly": kind == "full" and is_month_end,
+            "created_at": now.isoformat(),
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "compression": BACKUP_COMPRESSION,
+            "archive_partitions": archive_partitions,
+            "files": files,
+        }
+        # Written last: a set only counts once its manifest exists
+        with open(os.path.join(backup_dir, MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(backup_dir, MANIFEST + ".tmp"), os.path.join(backup_dir, MANIFEST))
+
+        logger.info("Backup complete: %s", backup_dir, extra={
+            "backup_dir": backup_dir, "type": kind, "rows": sum(f["rows"] for f in files if f["kind"] != "keys"),
+        })
+    except Exception:
+        logger.exception("Backup failed", extra={"backup_dir": backup_dir})
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        return
+
+    prune_backups(now)
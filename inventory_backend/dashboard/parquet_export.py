@@ -0,0 +1,126 @@
+import os
+import json
+import uuid
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+# Rows fetched per server-side cursor batch; each batch becomes one row group
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "100000"))
+
+# Exportable tables/views -> time column for since/until filtering (users is left out on purpose)
+EXPORT_TABLES = {
+    "inventory_units": "serial_assigned_at",
+    "inventory_units_all": "serial_assigned_at",
+    "inventory_log": "event_time",
+    "inventory_log_all": "event_time",
+    "manual_review": "created_at",
+    "returns": "return_date",
+    "repairs": "repaired_at",
+    "disposals": "disposed_at",
+    "reconciled_items": "reconciled_at",
+    "untracked_serial_sales": "created_at",
+    "products": None,
+    "master_skus": "created_at",
+    "brands": None,
+    "categories": None,
+    "ssds": None,
+}
+
+# Postgres type OID -> Arrow type; anything else is written as a string
+_ARROW_TYPES = {
+    16: lambda: pa.bool_(),
+    20: lambda: pa.int64(),
+    21: lambda: pa.int16(),
+    23: lambda: pa.int32(),
+    700: lambda: pa.float32(),
+    701: lambda: pa.float64(),
+    1082: lambda: pa.date32(),
+    1114: lambda: pa.timestamp("us"),
+    1184: lambda: pa.timestamp("us", tz="UTC"),
+}
+_TEXT_TYPES = {19, 25, 1042, 1043}
+_JSON_TYPES = {114, 3802}
+_NUMERIC = 1700
+
+
+def available():
+    return pa is not None
+
+
+def _column(description):
+    """(Arrow type, value converter or None) for one cursor.description entry."""
+    oid = description.type_code
+    if oid in _ARROW_TYPES:
+        return _ARROW_TYPES[oid](), None
+    if oid == _NUMERIC:
+        # Only numeric(p,s) that fits decimal128; unconstrained numeric reports typmod sentinels here.
+        # The rest stay exact as text rather than lossy floats (these are prices).
+        precision, scale = description.precision, description.scale
+        if precision is not None and scale is not None and 1 <= precision <= 38 and 0 <= scale <= precision:
+            return pa.decimal128(precision, scale), None
+        return pa.string(), str
+    if oid in _TEXT_TYPES:
+        return pa.string(), None
+    if oid in _JSON_TYPES:
+        return pa.string(), json.dumps
+    return pa.string(), str
+
+
+def export_parquet(conn, query, path, params=None):
+    """Stream a query into a Parquet file through a server-side cursor, one row group per batch.
+
+    Columns keep their Postgres types (timestamps, booleans, integers, numerics) and row groups
+    carry min/max statistics. Params use psycopg2 style (%(name)s). Returns a manifest-style entry.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export needs the pyarrow package")
+
+    cursor = conn.connection.cursor(name=f"parquet_{uuid.uuid4().hex[:12]}")
+    cursor.itersize = PARQUET_ROW_GROUP_SIZE
+    writer = None
+    total = 0
+    try:
+        cursor.execute(query, params or None)
+        rows = cursor.fetchmany(PARQUET_ROW_GROUP_SIZE)
+        columns = [_column(d) for d in cursor.description]
+        schema = pa.schema([(d.name, arrow_type) for d, (arrow_type, _) in zip(cursor.description, columns)])
+        writer = pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION, write_statistics=True)
+        while rows:
+            values = list(zip(*rows))
+            arrays = [
+                pa.array([None if v is None else convert(v) for v in col] if convert else col, type=arrow_type)
+                for col, (arrow_type, convert) in zip(values, columns)
+            ]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            total += len(rows)
+            rows = cursor.fetchmany(PARQUET_ROW_GROUP_SIZE)
+    finally:
+        if writer is not None:
+            writer.close()
+        cursor.close()
+
+    size = os.path.getsize(path)
+    logger.info("Exported %s rows to %s", total, path, extra={"rows": total, "bytes": size, "path": path})
+    return {"file": os.path.basename(path), "rows": total, "bytes": size}
+
+
+def export_query(table, since=None, until=None):
+    """SELECT for an EXPORT_TABLES entry, optionally bounded on its time column; returns (sql, params)."""
+    time_column = EXPORT_TABLES[table]
+    where, params = [], {}
+    if time_column and since:
+        where.append(f"{time_column} >= %(since)s")
+        params["since"] = since
+    if time_column and until:
+        where.append(f"{time_column} < %(until)s")
+        params["until"] = until
+    sql = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+    return sql, params
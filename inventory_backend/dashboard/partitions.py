@@ -0,0 +1,77 @@
+import os
+import re
+import logging
+from datetime import date
+from sqlalchemy import text
+from inventory_backend.database import engine
+from inventory_backend.sql_instrumentation import instrumented_job
+
+logger = logging.getLogger(__name__)
+
+# Empty partitions kept ready ahead of the current month
+INVENTORY_LOG_MONTHS_AHEAD = int(os.getenv("INVENTORY_LOG_MONTHS_AHEAD", "3"))
+# Partitions whose month ended this many months ago move to archive.inventory_log_archive; 0 disables
+INVENTORY_LOG_ARCHIVE_AFTER_MONTHS = int(os.getenv("INVENTORY_LOG_ARCHIVE_AFTER_MONTHS", "24"))
+# Optional tablespace (e.g. on cheaper disks) for archived partitions
+ARCHIVE_TABLESPACE = os.getenv("ARCHIVE_TABLESPACE")
+
+_PARTITION_NAME = re.compile(r"^inventory_log_(\d{4})_(\d{2})$")
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@instrumented_job("inventory_log_partitions")
+def maintain_inventory_log_partitions():
+    """Create upcoming monthly partitions and archive the ones past the retention window."""
+    this_month = date.today().replace(day=1)
+    with engine.begin() as conn:
+        for i in range(INVENTORY_LOG_MONTHS_AHEAD + 1):
+            conn.execute(
+                text("SELECT create_inventory_log_partition(:month)"),
+                {"month": _add_months(this_month, i)},
+            )
+
+    if INVENTORY_LOG_ARCHIVE_AFTER_MONTHS > 0:
+        archive_inventory_log_partitions(_add_months(this_month, -INVENTORY_LOG_ARCHIVE_AFTER_MONTHS))
+
+
+def archive_inventory_log_partitions(before):
+    """Detach live partitions for months before `before` and attach them under the archive parent."""
+    if ARCHIVE_TABLESPACE and not re.fullmatch(r"\w+", ARCHIVE_TABLESPACE):
+        raise ValueError(f"Invalid ARCHIVE_TABLESPACE: {ARCHIVE_TABLESPACE!r}")
+
+    with engine.connect() as conn:
+        names = conn.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.inventory_log'::regclass
+            ORDER BY c.relname
+        """)).scalars().all()
+
+    archived = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if month >= before:
+            continue
+
+        # One partition per transaction; lock_timeout keeps a busy parent from stalling the API
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE public.inventory_log DETACH PARTITION public.{name}"))
+            conn.execute(text(f"ALTER TABLE public.{name} SET SCHEMA archive"))
+            if ARCHIVE_TABLESPACE:
+                conn.execute(text(f"ALTER TABLE archive.{name} SET TABLESPACE {ARCHIVE_TABLESPACE}"))
+            conn.execute(text(
+                f"ALTER TABLE archive.inventory_log_archive ATTACH PARTITION archive.{name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+        archived.append(name)
+        logger.info("Archived inventory_log partition %s", name, extra={"partition": name})
+
+    return archived
@@ -1,25 +1,34 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy import text
-from inventory_backend.database import engine
+from inventory_backend.database import (
+    async_engine, get_read_engine, get_async_read_engine, run_on_shared_snapshot_async, pool_stats
+)
+from inventory_backend.sql_instrumentation import sql_stats
+from inventory_backend.serialization import FastJSONResponse, dumps, rows_response, rows_to_dicts
 from typing import Optional
 import os
 import requests
 from datetime import datetime, timedelta
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, FileResponse
+from starlette.background import BackgroundTask
 import pytz
 from .sync_logic import sync_veeqo_orders_job
+from . import parquet_export
 
 from fastapi.responses import StreamingResponse
 import io
 import csv
-import traceback
+import logging
+import hashlib
+import tempfile
 
 class PriceUpdate(BaseModel):
     product_id: int
     price: Optional[float]
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 VEEQO_API_KEY = os.getenv("VEEQO_API_KEY")
 if not VEEQO_API_KEY:
@@ -31,91 +40,133 @@ def dashboard_ping():
     return {"dashboard": "pong"}
 
 
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """Connection pool usage: live gauges, checkout counts, wait times and overflow/timeouts."""
+    return pool_stats()
+
+
+@router.get("/sql-stats")
+def get_sql_stats(top: int = 25):
+    """Per-statement latency/row totals, per-route/job latency percentiles and the slow-query log."""
+    return sql_stats(top)
+
+
 @router.get("/products")
-def get_products():
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT * FROM view_product_stock_summary"))
-        rows = result.fetchall()
-        keys = result.keys()
-        return [dict(zip(keys, row)) for row in rows]
+async def get_products():
+    async with get_async_read_engine().connect() as conn:
+        result = await conn.execute(text("SELECT * FROM view_product_stock_summary"))
+        return rows_response(result)
 
 
-@router.get("/grouped-products")
-def get_grouped_products():
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            WITH base AS (
-                SELECT 
-                    m.master_sku_id,
-                    m.description,
-                    p.product_id,
-                    p.product_name,
-                    p.part_number,
-                    p.brand,
+async def fetch_grouped_products(conn):
+    result = await conn.execute(text("""
+        WITH base AS (
+            SELECT 
+                m.master_sku_id,
+                m.description,
+                p.product_id,
+                p.product_name,
+                p.part_number,
+                p.brand,
+                (
                     (
+                        SELECT COUNT(*) 
+                        FROM inventory_units iu
+                        WHERE iu.product_id = p.product_id
+                        AND iu.sold = FALSE
+                        AND iu.serial_number != 'NOSER'
+                    )
+                    -
+                    COALESCE(
                         (
-                            SELECT COUNT(*) 
-                            FROM inventory_units iu
-                            WHERE iu.product_id = p.product_id
-                            AND iu.sold = FALSE
-                            AND iu.serial_number != 'NOSER'
-                        )
-                        -
-                        COALESCE(
-                            (
-                                SELECT SUM(quantity)
-                                FROM untracked_serial_sales uss
-                                WHERE uss.product_id = p.product_id
-                            ), 
-                            0
-                        )
-                    ) AS quantity
-                FROM products p
-                JOIN master_skus m ON p.master_sku_id = m.master_sku_id
-            )
-            SELECT * FROM base
-            WHERE quantity > 0
-            ORDER BY master_sku_id, product_id;
-        """))
-        rows = result.fetchall()
-        keys = result.keys()
-        return [dict(zip(keys, row)) for row in rows]
+                            SELECT SUM(quantity)
+                            FROM untracked_serial_sales uss
+                            WHERE uss.product_id = p.product_id
+                        ), 
+                        0
+                    )
+                ) AS quantity
+            FROM products p
+            JOIN master_skus m ON p.master_sku_id = m.master_sku_id
+        )
+        SELECT * FROM base
+        WHERE quantity > 0
+        ORDER BY master_sku_id, product_id;
+    """))
+    return rows_to_dicts(result)
+
+
+async def fetch_manual_check_items(conn):
+    result = await conn.execute(text("""
+        SELECT review_id AS id, order_id, sku, created_at
+        FROM manual_review
+        WHERE resolved = FALSE
+        ORDER BY created_at DESC
+        LIMIT 50
+    """))
+    return rows_to_dicts(result)
+
+
+async def fetch_inventory_log(conn):
+    result = await conn.execute(text("""
+        SELECT sku, serial_number, order_id, event_time
+        FROM inventory_log
+        ORDER BY event_time DESC
+        LIMIT 100
+    """))
+    return rows_to_dicts(result)
+
+
+def etag_response(request: Request, payload):
+    """JSON response with a content-hash ETag; answers 304 when the client already has it."""
+    body = dumps(payload)
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    # no-cache: the browser keeps the body but revalidates it with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/grouped-products")
+async def get_grouped_products():
+    async with get_async_read_engine().connect() as conn:
+        return FastJSONResponse(await fetch_grouped_products(conn))
 
 
 
 
 @router.get("/manual-check")
-def get_manual_check_items():
+async def get_manual_check_items():
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT review_id AS id, order_id, sku, created_at
-                FROM manual_review
-                WHERE resolved = FALSE
-                ORDER BY created_at DESC
-                LIMIT 50
-            """))
-            rows = result.fetchall()
-            keys = result.keys()
-            return [dict(zip(keys, row)) for row in rows]
+        async with async_engine.connect() as conn:
+            return FastJSONResponse(await fetch_manual_check_items(conn))
     except Exception as e:
-        print("Manual check failed:", e)
+        logger.exception("Error in /dashboard/manual-check")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 
 @router.get("/inventory-log")
-def get_inventory_log():
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT sku, serial_number, order_id, event_time
-            FROM inventory_log
-            ORDER BY event_time DESC
-            LIMIT 100
-        """))
-        rows = result.fetchall()
-        keys = result.keys()
-        return [dict(zip(keys, row)) for row in rows]
+async def get_inventory_log():
+    async with get_async_read_engine().connect() as conn:
+        return FastJSONResponse(await fetch_inventory_log(conn))
+
+
+@router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """Initial dashboard payload: grouped products, inventory log and manual checks from one snapshot."""
+    grouped_products, inventory_log, manual_check = await run_on_shared_snapshot_async([
+        fetch_grouped_products,
+        fetch_inventory_log,
+        fetch_manual_check_items,
+    ], bind=get_async_read_engine())
+    return etag_response(request, {
+        "grouped_products": grouped_products,
+        "inventory_log": inventory_log,
+        "manual_check": manual_check
+    })
 
 @router.post("/sync-veeqo-orders")
 def sync_veeqo_orders():
@@ -127,16 +178,16 @@ def sync_veeqo_orders():
     }
 
 @router.get("/insights/po-details")
-def get_po_details(po_number: str):
-    with engine.connect() as conn:
-        result = conn.execute(text("""
+async def get_po_details(po_number: str):
+    async with get_async_read_engine().connect() as conn:
+        result = (await conn.execute(text("""
             SELECT 
                 p.part_number AS sku,
                 p.product_name,
                 iu.po_number,
                 iu.serial_number,
                 iu.serial_assigned_at::date AS received_date
-            FROM inventory_units iu
+            FROM inventory_units_all iu
             JOIN products p ON iu.product_id = p.product_id
             WHERE iu.po_number = :po
 
@@ -153,7 +204,7 @@ def get_po_details(po_number: str):
             WHERE r.po_number = :po
 
             ORDER BY sku, received_date, serial_number
-        """), {"po": po_number}).fetchall()
+        """), {"po": po_number})).fetchall()
 
         data = {}
         for row in result:
@@ -173,9 +224,9 @@ def get_po_details(po_number: str):
         ]
 
 @router.get("/insights/unit-details")
-def get_unit_details(serial_number: str):
-    with engine.connect() as conn:
-        row = conn.execute(text("""
+async def get_unit_details(serial_number: str):
+    async with get_async_read_engine().connect() as conn:
+        row = (await conn.execute(text("""
             SELECT 
                 p.part_number AS sku,
                 p.product_name,
@@ -183,10 +234,10 @@ def get_unit_details(serial_number: str):
                 iu.sold,
                 iu.is_damaged,
                 iu.po_number
-            FROM inventory_units iu
+            FROM inventory_units_all iu
             JOIN products p ON iu.product_id = p.product_id
             WHERE iu.serial_number = :sn
-        """), {"sn": serial_number}).fetchone()
+        """), {"sn": serial_number})).fetchone()
 
         if not row:
             raise HTTPException(status_code=404, detail="Serial number not found")
@@ -200,6 +251,214 @@ def get_unit_details(serial_number: str):
             "po_number": row.po_number
         }
 
+@router.get("/insights/unit-timeline")
+async def get_unit_timeline(serial_number: str):
+    """Ordered lifecycle events for one serial, stitched from every table that references it."""
+    async with get_async_read_engine().connect() as conn:
+        rows = (await conn.execute(text("""
+            WITH units AS (
+                SELECT unit_id FROM inventory_units_all WHERE serial_number = :sn
+                UNION
+                SELECT original_unit_id FROM returns
+                WHERE serial_number = :sn AND original_unit_id IS NOT NULL
+            ),
+            events AS (
+                SELECT 'received' AS event, r.serial_assigned_at AS event_time, 1 AS stage,
+                       r.original_unit_id AS unit_id, p.part_number, NULL::text AS new_part_number,
+                       r.po_number, NULL::text AS order_id, u.username, NULL::text AS memo_number
+                FROM returns r
+                JOIN products p ON r.product_id = p.product_id
+                LEFT JOIN users u ON r.assigned_by_user_id = u.user_id
+                WHERE r.serial_number = :sn
+
+                UNION ALL
+
+                -- Units added before migration 0008 have no receive time; they show only "serial assigned"
+                SELECT 'received', iu.received_at, 1,
+                       iu.unit_id, p.part_number, NULL, iu.po_number, NULL, NULL, NULL
+                FROM inventory_units_all iu
+                JOIN products p ON iu.product_id = p.product_id
+                WHERE iu.serial_number = :sn AND iu.po_number != 'RETURN' AND iu.received_at IS NOT NULL
+
+                UNION ALL
+
+                SELECT 'serial assigned', iu.serial_assigned_at, 2,
+                       iu.unit_id, p.part_number, NULL, iu.po_number, NULL, u.username, NULL
+                FROM inventory_units_all iu
+                JOIN products p ON iu.product_id = p.product_id
+                LEFT JOIN users u ON iu.assigned_by_user_id = u.user_id
+                WHERE iu.serial_number = :sn
+
+                UNION ALL
+
+                SELECT 'sold', il.event_time, 3,
+                       NULL, il.sku, NULL, NULL, il.order_id, NULL, NULL
+                FROM inventory_log_all il
+                WHERE il.serial_number = :sn
+
+                UNION ALL
+
+                SELECT 'returned', r.return_date, 4,
+                       r.original_unit_id, p.part_number, NULL, r.po_number, NULL, NULL, NULL
+                FROM returns r
+                JOIN products p ON r.product_id = p.product_id
+                WHERE r.serial_number = :sn
+
+                UNION ALL
+
+                SELECT 'repaired', rp.repaired_at, 5,
+                       rp.unit_id, op.part_number, np.part_number, NULL, NULL, NULL, NULL
+                FROM repairs rp
+                JOIN units ON rp.unit_id = units.unit_id
+                JOIN products op ON rp.old_product_id = op.product_id
+                LEFT JOIN products np ON rp.new_product_id = np.product_id
+
+                UNION ALL
+
+                SELECT 'disposed', d.disposed_at, 6,
+                       d.unit_id, p.part_number, NULL, NULL, NULL, NULL, NULL
+                FROM disposals d
+                JOIN units ON d.unit_id = units.unit_id
+                JOIN products p ON d.original_product_id = p.product_id
+
+                UNION ALL
+
+                SELECT 'reconciled', ri.reconciled_at, 7,
+                       NULL, p.part_number, NULL, NULL, NULL, NULL, ri.memo_number
+                FROM reconciled_items ri
+                JOIN products p ON ri.product_id = p.product_id
+                WHERE ri.serial_number = :sn
+            )
+            SELECT * FROM events
+            ORDER BY event_time, stage
+        """), {"sn": serial_number})).fetchall()
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="Serial number not found")
+
+    return {
+        "serial_number": serial_number,
+        "received_time_recorded": any(row.event == "received" for row in rows),
+        "events": [
+            {
+                "event": row.event,
+                "event_time": row.event_time.isoformat() if row.event_time else None,
+                "unit_id": row.unit_id,
+                "part_number": row.part_number,
+                "new_part_number": row.new_part_number,
+                "po_number": row.po_number,
+                "order_id": row.order_id,
+                "username": row.username,
+                "memo_number": row.memo_number
+            } for row in rows
+        ]
+    }
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_LIMIT = 100
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("/insights/search")
+async def search_insights(q: str, limit: int = 25, offset: int = 0):
+    """Ranked prefix/substring/fuzzy lookup of serials, order IDs and PO numbers (pg_trgm indexed)."""
+    term = q.strip()
+    if len(term) < SEARCH_MIN_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search term must be at least {SEARCH_MIN_LENGTH} characters"
+        )
+
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    offset = max(offset, 0)
+    escaped = _escape_like(term)
+
+    async with get_async_read_engine().connect() as conn:
+        rows = (await conn.execute(text("""
+            WITH matches AS (
+                SELECT iu.serial_number AS value, 'serial' AS kind, 'inventory_units' AS source
+                FROM inventory_units_all iu
+                WHERE iu.serial_number != 'NOSER'
+                  AND (iu.serial_number ILIKE :pattern OR iu.serial_number % :term)
+
+                UNION ALL
+
+                SELECT iu.po_number, 'po', 'inventory_units'
+                FROM inventory_units_all iu
+                WHERE iu.po_number ILIKE :pattern OR iu.po_number % :term
+
+                UNION ALL
+
+                SELECT r.serial_number, 'serial', 'returns'
+                FROM returns r
+                WHERE r.serial_number ILIKE :pattern OR r.serial_number % :term
+
+                UNION ALL
+
+                SELECT r.po_number, 'po', 'returns'
+                FROM returns r
+                WHERE r.po_number ILIKE :pattern OR r.po_number % :term
+
+                UNION ALL
+
+                SELECT il.serial_number, 'serial', 'inventory_log'
+                FROM inventory_log il
+                WHERE il.serial_number ILIKE :pattern OR il.serial_number % :term
+
+                UNION ALL
+
+                SELECT il.order_id, 'order', 'inventory_log'
+                FROM inventory_log il
+                WHERE il.order_id ILIKE :pattern OR il.order_id % :term
+
+                UNION ALL
+
+                SELECT ri.serial_number, 'serial', 'reconciled_items'
+                FROM reconciled_items ri
+                WHERE ri.serial_number ILIKE :pattern OR ri.serial_number % :term
+            )
+            SELECT
+                value,
+                kind,
+                ARRAY_AGG(DISTINCT source ORDER BY source) AS sources,
+                (
+                    CASE
+                      WHEN LOWER(value) = LOWER(:term) THEN 3
+                      WHEN value ILIKE :prefix THEN 2
+                      WHEN value ILIKE :pattern THEN 1
+                      ELSE 0
+                    END
+                    + similarity(value, :term)
+                ) AS score
+            FROM matches
+            GROUP BY value, kind
+            ORDER BY score DESC, value
+            LIMIT :limit OFFSET :offset
+        """), {
+            "term": term,
+            "pattern": f"%{escaped}%",
+            "prefix": f"{escaped}%",
+            "limit": limit + 1,
+            "offset": offset
+        })).fetchall()
+
+    return {
+        "results": [
+            {
+                "value": row.value,
+                "kind": row.kind,
+                "sources": list(row.sources),
+                "score": round(float(row.score), 4)
+            } for row in rows[:limit]
+        ],
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(rows) > limit
+    }
+
 @router.get("/insights/monthly-report")
 def download_monthly_report(cutoff: str):
     """Generate monthly CSV summary up to the given cutoff datetime (ISO 8601 string)."""
@@ -208,7 +467,7 @@ def download_monthly_report(cutoff: str):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid cutoff datetime")
 
-    with engine.connect() as conn:
+    with get_read_engine().connect() as conn:
         result = conn.execute(text("""
             WITH params AS (
               SELECT 
@@ -271,10 +530,10 @@ def download_monthly_report(cutoff: str):
                   SELECT COUNT(*)
                   FROM inventory_log il
                   JOIN inventory_units iu ON il.serial_number = iu.serial_number
-                  JOIN params ON TRUE
                   WHERE iu.product_id = p.product_id
-                    AND il.event_time >= params.month_start
-                    AND il.event_time < params.cutoff
+                    -- literal bounds (not the params CTE) so only this month's partition is scanned
+                    AND il.event_time >= :month_start
+                    AND il.event_time < :cutoff_time
                 ) AS quantity_sold
 
               FROM products p
@@ -308,7 +567,10 @@ def download_monthly_report(cutoff: str):
               total
             FROM final
             ORDER BY master_sku;
-        """), {"cutoff_time": cutoff_time})
+        """), {
+            "cutoff_time": cutoff_time,
+            "month_start": cutoff_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        })
 
         output = io.StringIO()
         writer = csv.writer(output)
@@ -322,66 +584,128 @@ def download_monthly_report(cutoff: str):
             headers={"Content-Disposition": "attachment; filename=monthly_report.csv"}
         )
 
+async def fetch_sku_breakdowns(conn, master_sku_ids=None):
+    """Breakdown rows for the given master SKUs (all of them when None), keyed by master SKU."""
+    msku_filter, params = "", {}
+    if master_sku_ids is not None:
+        msku_filter, params = "AND p.master_sku_id = ANY(:mskus)", {"mskus": list(master_sku_ids)}
+    result = await conn.execute(text(f"""
+        WITH raw AS (
+            SELECT 
+                p.master_sku_id,
+                CASE 
+                  WHEN iu.is_damaged = TRUE THEN 'Damaged'
+                  ELSE p.part_number
+                END AS sku_group,
+                p.product_id,
+                p.price
+            FROM inventory_units iu
+            JOIN products p ON iu.product_id = p.product_id
+            WHERE iu.sold = FALSE
+              AND iu.serial_number != 'NOSER'
+              {msku_filter}
+        ),
+        soft_alloc AS (
+            SELECT 
+                product_id,
+                SUM(quantity) AS soft_qty
+            FROM untracked_serial_sales
+            GROUP BY product_id
+        ),
+        counted AS (
+            SELECT 
+                r.master_sku_id,
+                r.sku_group,
+                r.product_id,
+                r.price,
+                COUNT(*) AS raw_qty,
+                COALESCE(sa.soft_qty, 0) AS total_soft
+            FROM raw r
+            LEFT JOIN soft_alloc sa ON r.product_id = sa.product_id
+            GROUP BY r.master_sku_id, r.sku_group, r.product_id, r.price, sa.soft_qty
+        )
+        SELECT 
+            master_sku_id,
+            sku_group AS sku,
+            GREATEST(raw_qty - total_soft, 0) AS qty,
+            product_id,
+            price
+        FROM counted
+        WHERE GREATEST(raw_qty - total_soft, 0) > 0
+        ORDER BY master_sku_id, sku
+    """), params)
+
+    breakdowns = {msku: [] for msku in (master_sku_ids or [])}
+    for row in result:
+        breakdowns.setdefault(row.master_sku_id, []).append({
+            "sku": row.sku,
+            "qty": row.qty,
+            "product_id": row.product_id,
+            "price": float(row.price) if row.price is not None else None
+        })
+    return breakdowns
+
+
 @router.get("/sku-breakdown")
-def get_sku_breakdown(master_sku_id: str):
+async def get_sku_breakdown(master_sku_id: str):
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                WITH raw AS (
-                    SELECT 
-                        CASE 
-                          WHEN iu.is_damaged = TRUE THEN 'Damaged'
-                          ELSE p.part_number
-                        END AS sku_group,
-                        p.product_id,
-                        p.price
-                    FROM inventory_units iu
-                    JOIN products p ON iu.product_id = p.product_id
-                    WHERE p.master_sku_id = :msku
-                      AND iu.sold = FALSE
-                      AND iu.serial_number != 'NOSER'
-                ),
-                soft_alloc AS (
-                    SELECT 
-                        product_id,
-                        SUM(quantity) AS soft_qty
-                    FROM untracked_serial_sales
-                    GROUP BY product_id
-                ),
-                counted AS (
-                    SELECT 
-                        r.sku_group,
-                        r.product_id,
-                        r.price,
-                        COUNT(*) AS raw_qty,
-                        COALESCE(sa.soft_qty, 0) AS total_soft
-                    FROM raw r
-                    LEFT JOIN soft_alloc sa ON r.product_id = sa.product_id
-                    GROUP BY r.sku_group, r.product_id, r.price, sa.soft_qty
-                )
-                SELECT 
-                    sku_group AS sku,
-                    GREATEST(raw_qty - total_soft, 0) AS qty,
-                    product_id,
-                    price
-                FROM counted
-                WHERE GREATEST(raw_qty - total_soft, 0) > 0
-                ORDER BY sku
-            """), {"msku": master_sku_id})
-
-            rows = result.fetchall()
-            if not rows:
-                return []
-
-            return [
-                {
-                    "sku": row.sku,
-                    "qty": row.qty,
-                    "product_id": row.product_id,
-                    "price": float(row.price) if row.price is not None else None
-                } for row in rows
-            ]
+        async with get_async_read_engine().connect() as conn:
+            return (await fetch_sku_breakdowns(conn, [master_sku_id]))[master_sku_id]
 
-    except Exception as e:
-        print(f"Error in /dashboard/sku-breakdown: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve SKU breakdown")
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in /dashboard/sku-breakdown")
+        raise HTTPException(status_code=500, detail="Failed to retrieve SKU breakdown")
+
+
+@router.get("/sku-breakdowns")
+async def get_sku_breakdowns(request: Request, master_sku_ids: str = "all"):
+    """Breakdowns for many master SKUs from one grouped query; pass a comma-separated list or "all"."""
+    if master_sku_ids.strip().lower() == "all":
+        ids = None
+    else:
+        ids = [m.strip() for m in master_sku_ids.split(",") if m.strip()]
+        if not ids:
+            raise HTTPException(status_code=400, detail="No master SKU IDs given")
+
+    try:
+        async with get_async_read_engine().connect() as conn:
+            breakdowns = await fetch_sku_breakdowns(conn, ids)
+    except Exception:
+        logger.exception("Error in /dashboard/sku-breakdowns")
+        raise HTTPException(status_code=500, detail="Failed to retrieve SKU breakdowns")
+
+    return etag_response(request, breakdowns)
+
+
+@router.get("/export/parquet")
+def export_parquet(table: str, since: Optional[str] = None, until: Optional[str] = None):
+    """Download a table (or an *_all history view) as Parquet, optionally bounded on its time column."""
+    if not parquet_export.available():
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed on the server")
+    if table not in parquet_export.EXPORT_TABLES:
+        raise HTTPException(status_code=400, detail=f"Unknown table: {table}")
+    try:
+        since_time = datetime.fromisoformat(since) if since else None
+        until_time = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since/until datetime")
+
+    sql, params = parquet_export.export_query(table, since_time, until_time)
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        with get_read_engine().begin() as conn:
+            # Large exports are expected to outlive the API statement timeout
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            parquet_export.export_parquet(conn, sql, path, params)
+    except Exception:
+        os.remove(path)
+        logger.exception("Error in /dashboard/export/parquet")
+        raise HTTPException(status_code=500, detail="Failed to export table")
+
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{table}_{datetime.now():%Y%m%d_%H%M%S}.parquet",
+        background=BackgroundTask(os.remove, path),
+    )
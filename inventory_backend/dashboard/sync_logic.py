@@ -3,9 +3,19 @@ from sqlalchemy import text
 import pytz
 import requests
 import os
+import json
+import logging
 from inventory_backend.database import engine
+from inventory_backend.sql_instrumentation import instrumented_job
 
 VEEQO_API_KEY = os.getenv("VEEQO_API_KEY")
+# Overridable so load tests can point the sync at a local fake (loadtest/fake_veeqo.py)
+VEEQO_API_URL = os.getenv("VEEQO_API_URL", "https://api.veeqo.com/orders")
+# How far back the per-order inventory_log lookups look; keeps them on the recent partitions.
+# Must exceed the age of any order the Veeqo query can still return (7 days).
+SYNC_LOOKBACK_DAYS = int(os.getenv("SYNC_LOOKBACK_DAYS", "30"))
+
+logger = logging.getLogger(__name__)
 
 def get_available_products_by_ssd(conn, ssd_id):
     result = conn.execute(text("""
@@ -30,13 +40,14 @@ def get_available_products_by_ssd(conn, ssd_id):
     return [dict(row) for row in result.fetchall()]
 
 
+@instrumented_job("sync_veeqo_orders")
 def sync_veeqo_orders_job():
     def fetch_orders():
         la_tz = pytz.timezone("America/Los_Angeles")
         now_local = datetime.now(la_tz)
         today = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
 
-        url = "https://api.veeqo.com/orders"
+        url = VEEQO_API_URL
         headers = {
             "x-api-key": VEEQO_API_KEY,
             "accept": "application/json"
@@ -81,6 +92,7 @@ def sync_veeqo_orders_job():
 
     la_tz = pytz.timezone("America/Los_Angeles")
     ssd_cutoff = la_tz.localize(datetime(2025, 7, 11, 0, 0, 0))
+    since = datetime.now(la_tz) - timedelta(days=SYNC_LOOKBACK_DAYS)
 
     with engine.begin() as conn:
         for order in orders:
@@ -88,10 +100,10 @@ def sync_veeqo_orders_job():
 
             # Add this check to skip already processed orders:
             existing_order = conn.execute(text("""
-                SELECT 1 FROM inventory_log WHERE order_id = :order_id LIMIT 1
-            """), {"order_id": order_id}).fetchone()
+                SELECT 1 FROM inventory_log WHERE order_id = :order_id AND event_time >= :since LIMIT 1
+            """), {"order_id": order_id, "since": since}).fetchone()
             if existing_order:
-                print(f"[INFO] Order {order_id} already processed — skipping")
+                logger.debug("Order %s already processed — skipping", order_id, extra={"order_id": order_id})
                 continue
                 
             shipped_time_str = order.get("shipped_at")
@@ -120,7 +132,10 @@ def sync_veeqo_orders_job():
                 total_qty = sum(qty for _, qty in sku_quantities)
 
                 if is_all_512 and len(serials) == total_qty:
-                    print(f"[INFO] Fallback: {len(serials)} serials for 512GB order with qty {total_qty} (expected {2 * total_qty})")
+                    logger.info(
+                        "Fallback: %s serials for 512GB order with qty %s (expected %s)", len(serials), total_qty, 2 * total_qty,
+                        extra={"order_id": order_id},
+                    )
 
                     inserted_count = 0
                     for _ in range(total_qty):
@@ -147,7 +162,10 @@ def sync_veeqo_orders_job():
                         """)).fetchone()
 
                         if not row:
-                            print(f"[WARNING] Only assigned {inserted_count} SSDs for fallback — short by {total_qty - inserted_count}")
+                            logger.warning(
+                                "Only assigned %s SSDs for fallback — short by %s", inserted_count, total_qty - inserted_count,
+                                extra={"order_id": order_id},
+                            )
                             break
 
                         conn.execute(text("""
@@ -164,7 +182,11 @@ def sync_veeqo_orders_job():
                     expected_serials_total = total_qty  # Adjust so the rest of processing proceeds
 
                 else:
-                    print(f"[MANUAL REVIEW] Serial count mismatch — Order {order_id}, SKU totals: {sku_quantities}, expected serials: {expected_serials_total}, received: {len(serials)}")
+                    logger.warning(
+                        "Manual review: serial count mismatch for order %s (expected %s, received %s)",
+                        order_id, expected_serials_total, len(serials),
+                        extra={"order_id": order_id, "sku_quantities": sku_quantities},
+                    )
                     # Insert manual review per SKU
                     inserted = set()
                     for sku, _ in sku_quantities:
@@ -188,14 +210,20 @@ def sync_veeqo_orders_job():
             all_valid = True
             for s in serials:
                 res = conn.execute(text("""
-                    SELECT sold FROM inventory_units WHERE serial_number = :serial
+                    SELECT sold FROM inventory_units_all WHERE serial_number = :serial
                 """), {"serial": s}).fetchone()
                 if not res:
-                    print(f"[MANUAL REVIEW] Serial {s} not found in inventory_units for Order {order_id}")
+                    logger.warning(
+                        "Manual review: serial %s not found in inventory_units for order %s", s, order_id,
+                        extra={"order_id": order_id, "serial_number": s},
+                    )
                     all_valid = False
                     break
                 if res.sold:
-                    print(f"[MANUAL REVIEW] Serial {s} already sold for Order {order_id}")
+                    logger.warning(
+                        "Manual review: serial %s already sold for order %s", s, order_id,
+                        extra={"order_id": order_id, "serial_number": s},
+                    )
                     all_valid = False
                     break
 
@@ -234,7 +262,7 @@ def sync_veeqo_orders_job():
                         conn.execute(text("""
                             INSERT INTO inventory_log (sku, serial_number, order_id, event_time)
                             VALUES (:sku, :serial, :order_id, :event_time)
-                            ON CONFLICT (serial_number, order_id) DO NOTHING
+                            ON CONFLICT DO NOTHING
                         """), {
                             "sku": sku,
                             "serial": serial,
@@ -254,9 +282,9 @@ def sync_veeqo_orders_job():
                 FROM returns r
                 JOIN inventory_units iu ON r.original_unit_id = iu.unit_id
                 JOIN inventory_log il ON il.serial_number = iu.serial_number
-                WHERE il.order_id = :order_id
+                WHERE il.order_id = :order_id AND il.event_time >= :since
                 LIMIT 1
-            """), {"order_id": order_id}).fetchone()
+            """), {"order_id": order_id, "since": since}).fetchone()
 
             if shipped_time >= ssd_cutoff and not is_return_order:
                 total_ssds_needed = sum(
@@ -272,8 +300,8 @@ def sync_veeqo_orders_job():
                         SELECT COUNT(*) FROM inventory_log il
                         JOIN inventory_units iu ON il.serial_number = iu.serial_number
                         JOIN products p ON iu.product_id = p.product_id
-                        WHERE il.order_id = :order_id AND p.ssd_id = 2
-                    """), {"order_id": order_id}).scalar()
+                        WHERE il.order_id = :order_id AND il.event_time >= :since AND p.ssd_id = 2
+                    """), {"order_id": order_id, "since": since}).scalar()
 
                     remaining = total_ssds_needed - existing_ssd_count
                     if remaining > 0:
@@ -287,7 +315,10 @@ def sync_veeqo_orders_job():
                         """), {"qty": remaining}).fetchall()
 
                         if len(ssd_rows) < remaining:
-                            print(f"[WARNING] Only found {len(ssd_rows)} available SSDs for Order {order_id}, needed {remaining}")
+                            logger.warning(
+                                "Only found %s available SSDs for order %s, needed %s", len(ssd_rows), order_id, remaining,
+                                extra={"order_id": order_id},
+                            )
 
                         for ssd_row in ssd_rows:
                             ssd_serial = ssd_row.serial_number
@@ -305,15 +336,18 @@ def sync_veeqo_orders_job():
                                 UPDATE inventory_units SET sold = TRUE WHERE serial_number = :serial
                             """), {"serial": ssd_serial})
 
-                            print(f"[SSD] Marked 1TB SSD {ssd_serial} as sold for Order {order_id}")
+                            logger.info(
+                                "Marked 1TB SSD %s as sold for order %s", ssd_serial, order_id,
+                                extra={"order_id": order_id, "serial_number": ssd_serial},
+                            )
 
             elif is_return_order:
-                print(f"[SSD] Skipping SSD logic for Order {order_id} — contains return serials")
+                logger.info("Skipping SSD logic for order %s — contains return serials", order_id, extra={"order_id": order_id})
 
             # --- 6. Report unused serials if any ---
             if serial_pointer < len(serials):
                 unassigned = serials[serial_pointer:]
-                print(f"[INFO] Unused serials for order {order_id}: {unassigned}")
+                logger.info("Unused serials for order %s: %s", order_id, unassigned, extra={"order_id": order_id})
 
              # --- 7. Ensure soft allocation for 1TB SSDs ---
             if shipped_time >= ssd_cutoff and not is_return_order:
@@ -330,12 +364,15 @@ def sync_veeqo_orders_job():
                     SELECT COUNT(*) FROM inventory_log il
                     JOIN inventory_units iu ON il.serial_number = iu.serial_number
                     JOIN products p ON iu.product_id = p.product_id
-                    WHERE il.order_id = :order_id AND p.ssd_id = 2
-                """), {"order_id": order_id}).scalar()
+                    WHERE il.order_id = :order_id AND il.event_time >= :since AND p.ssd_id = 2
+                """), {"order_id": order_id, "since": since}).scalar()
 
                 soft_qty_to_allocate = total_1tb_needed - already_allocated
                 if soft_qty_to_allocate > 0:
-                    print(f"[INFO] Trying soft allocation of {soft_qty_to_allocate} SSDs for Order {order_id}")
+                    logger.info(
+                        "Trying soft allocation of %s SSDs for order %s", soft_qty_to_allocate, order_id,
+                        extra={"order_id": order_id},
+                    )
                     available_products = get_available_products_by_ssd(conn, ssd_id=2)
                     to_allocate = soft_qty_to_allocate
 
@@ -357,7 +394,10 @@ def sync_veeqo_orders_job():
                         to_allocate -= qty
 
                     if to_allocate > 0:
-                        print(f"[MANUAL REVIEW] Could not soft allocate {to_allocate} SSDs for Order {order_id}")
+                        logger.warning(
+                            "Manual review: could not soft allocate %s SSDs for order %s", to_allocate, order_id,
+                            extra={"order_id": order_id},
+                        )
                         conn.execute(text("""
                             INSERT INTO manual_review (order_id, sku, reason, metadata, created_at)
                             VALUES (:order_id, 'SSD-1TB', 'Soft allocation failed', :metadata, :created_at)
@@ -372,4 +412,5 @@ def sync_veeqo_orders_job():
                             "created_at": shipped_time
                         })
 
+    logger.info("Veeqo sync finished: %s orders fetched", len(orders), extra={"orders": len(orders)})
     return updated
@@ -0,0 +1,79 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from inventory_backend.database import DATABASE_URL, engine
+from inventory_backend.sql_instrumentation import instrumented_job
+
+logger = logging.getLogger(__name__)
+
+# Units sold more than this many days ago move to inventory_units_archive; 0 disables
+UNIT_ARCHIVE_AFTER_DAYS = int(os.getenv("UNIT_ARCHIVE_AFTER_DAYS", "180"))
+UNIT_ARCHIVE_BATCH_SIZE = int(os.getenv("UNIT_ARCHIVE_BATCH_SIZE", "5000"))
+
+# Named rather than *, so the move never depends on the two tables' column order. A column added to
+# inventory_units must be added to inventory_units_archive and here.
+UNIT_COLUMNS = (
+    "unit_id, product_id, serial_number, serial_assigned_at, assigned_by_user_id, po_number, "
+    "sn_prefix, sold, is_damaged, updated_at, received_at"
+)
+
+# Moves one unit back into the hot table (returns, cleared orders); a no-op if it isn't archived
+RESTORE_ARCHIVED_UNIT = text(f"""
+    WITH restored AS (
+        DELETE FROM inventory_units_archive WHERE serial_number = :sn RETURNING {UNIT_COLUMNS}
+    )
+    INSERT INTO inventory_units ({UNIT_COLUMNS}) SELECT {UNIT_COLUMNS} FROM restored
+""")
+
+_ARCHIVE_BATCH = text(f"""
+    WITH moved AS (
+        DELETE FROM inventory_units
+        WHERE unit_id IN (
+            -- A unit is sold after its serial is assigned, so serial_assigned_at narrows the candidates
+            -- (partial index); the sale time is the unit's latest inventory_log event
+            SELECT iu.unit_id FROM inventory_units iu
+            WHERE iu.sold = TRUE AND iu.serial_assigned_at < :cutoff
+              AND NOT EXISTS (
+                  SELECT 1 FROM inventory_log_all il
+                  WHERE il.serial_number = iu.serial_number AND il.event_time >= :cutoff
+              )
+            ORDER BY iu.serial_assigned_at
+            LIMIT :batch
+            FOR UPDATE OF iu SKIP LOCKED
+        )
+        RETURNING {UNIT_COLUMNS}
+    )
+    INSERT INTO inventory_units_archive ({UNIT_COLUMNS}) SELECT {UNIT_COLUMNS} FROM moved
+""")
+
+
+@instrumented_job("archive_sold_units")
+def archive_sold_units():
+    """Move long-sold units to the cold table in small batches so the hot table stays cache-sized."""
+    if UNIT_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+
+    cutoff = datetime.now() - timedelta(days=UNIT_ARCHIVE_AFTER_DAYS)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            moved = conn.execute(_ARCHIVE_BATCH, {"cutoff": cutoff, "batch": UNIT_ARCHIVE_BATCH_SIZE}).rowcount
+        total += moved
+        if moved < UNIT_ARCHIVE_BATCH_SIZE:
+            break
+
+    if total:
+        # Make the freed pages reusable and refresh planner stats after a large move. A vacuum of the
+        # hot table outlives the API's statement timeout, so it gets its own unpooled connection
+        vacuum_engine = create_engine(
+            DATABASE_URL, poolclass=NullPool, connect_args={"options": "-c statement_timeout=0"}
+        )
+        try:
+            with vacuum_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("VACUUM (ANALYZE) inventory_units"))
+        finally:
+            vacuum_engine.dispose()
+        logger.info("Archived %s sold units", total, extra={"units": total, "cutoff": cutoff.isoformat()})
+    return total
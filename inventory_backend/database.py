@@ -1,6 +1,16 @@
 import os
-from sqlalchemy import create_engine
+import re
+import time
+import asyncio
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
+from inventory_backend.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncPool, pool_status
+import inventory_backend.sql_instrumentation  # noqa: F401  (registers statement timing hooks)
 
 env_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(dotenv_path=env_path)
@@ -10,4 +20,226 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set in .env")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Pool sizing applies to each engine separately (sync and async pools)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Server-side timeouts in milliseconds; 0 disables
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "120000"))
+DB_LOCK_TIMEOUT_MS = int(os.getenv("DB_LOCK_TIMEOUT_MS", "10000"))
+
+_pool_kwargs = dict(
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+)
+
+# Replica for read-only dashboard/report queries and backups; falls back to the primary
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+# A client's reads stay on the primary this long after one of its requests commits a write (replica lag)
+READ_AFTER_WRITE_WINDOW_S = float(os.getenv("READ_AFTER_WRITE_WINDOW_S", "5"))
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _make_engine(url, name):
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        connect_args={
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS} -c lock_timeout={DB_LOCK_TIMEOUT_MS}"
+        },
+        **_pool_kwargs,
+    )
+
+
+def _make_async_engine(url, name):
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedAsyncPool,
+        pool_logging_name=name,
+        connect_args={
+            "server_settings": {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+                "lock_timeout": str(DB_LOCK_TIMEOUT_MS),
+            }
+        },
+        **_pool_kwargs,
+    )
+
+
+# Sync engine: scheduler jobs, backups and the remaining threadpool routes
+engine = _make_engine(DATABASE_URL, "primary")
+
+# Async engine (asyncpg) for the async def routes; same database, separate pool
+async_engine = _make_async_engine(DATABASE_URL, "primary_async")
+
+if DATABASE_READ_URL:
+    read_engine = _make_engine(DATABASE_READ_URL, "replica")
+    async_read_engine = _make_async_engine(DATABASE_READ_URL, "replica_async")
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+# Per-request state set by ReadAfterWriteMiddleware; None outside a request (jobs, scripts)
+_request_writes = ContextVar("request_writes", default=None)
+
+
+def _track_writes(sync_engine):
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _flag_statement(conn, cursor, statement, parameters, context, executemany):
+        if _request_writes.get() is not None:
+            conn.info["executed"] = True
+
+    @event.listens_for(sync_engine, "commit")
+    def _record_write(conn):
+        state = _request_writes.get()
+        if state is None or not conn.info.pop("executed", False):
+            return
+        # A transaction is given an xid only once it writes, whatever the statement looked like
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SELECT txid_current_if_assigned() IS NOT NULL")
+            if cursor.fetchone()[0]:
+                state["wrote"] = True
+        finally:
+            cursor.close()
+
+    @event.listens_for(sync_engine, "rollback")
+    def _discard_write(conn):
+        conn.info.pop("executed", None)
+
+
+# Only the primary engines: replica transactions can't write
+_track_writes(engine)
+_track_writes(async_engine.sync_engine)
+
+
+def recently_wrote():
+    """True while serving a request from a client that wrote recently, or that already wrote in this request."""
+    state = _request_writes.get()
+    return state is not None and (state["pinned"] or state["wrote"])
+
+
+def get_read_engine():
+    """Replica engine for read-only work, or the primary right after the calling client wrote."""
+    return engine if recently_wrote() else read_engine
+
+
+def get_async_read_engine():
+    return async_engine if recently_wrote() else async_read_engine
+
+
+def _pinned_to_primary(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+            if READ_PRIMARY_COOKIE in cookie:
+                try:
+                    return float(cookie[READ_PRIMARY_COOKIE].value) > time.time()
+                except ValueError:
+                    return False
+    return False
+
+
+class ReadAfterWriteMiddleware:
+    """Sets a short-lived cookie on responses whose request committed a write; while a client carries
+    it, get_read_engine() keeps that client's reads on the primary. Other clients keep using the replica.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not DATABASE_READ_URL:
+            return await self.app(scope, receive, send)
+
+        state = {"pinned": _pinned_to_primary(scope), "wrote": False}
+        token = _request_writes.set(state)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state["wrote"]:
+                until = time.time() + READ_AFTER_WRITE_WINDOW_S
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={until:.3f}; Max-Age={max(int(READ_AFTER_WRITE_WINDOW_S + 0.999), 1)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message.setdefault("headers", []).append((b"set-cookie", cookie.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_writes.reset(token)
+
+
+def pool_stats():
+    stats = {
+        "primary": pool_status(engine),
+        "primary_async": pool_status(async_engine.sync_engine),
+    }
+    if DATABASE_READ_URL:
+        stats["replica"] = pool_status(read_engine)
+        stats["replica_async"] = pool_status(async_read_engine.sync_engine)
+    return stats
+
+_SNAPSHOT_ID = re.compile(r"^[0-9A-F]+-[0-9A-F]+(-[0-9]+)?$", re.IGNORECASE)
+
+
+def run_on_shared_snapshot(readers, bind=None):
+    """Run each reader(conn) concurrently on its own connection, all on one REPEATABLE READ snapshot.
+
+    The first reader runs on the connection that exports the snapshot; the rest
+    import it in worker threads. Results are returned in the order of `readers`.
+    """
+    bind = bind or engine
+    with bind.connect() as leader:
+        leader = leader.execution_options(isolation_level="REPEATABLE READ")
+        with leader.begin():
+            snapshot_id = leader.execute(text("SELECT pg_export_snapshot()")).scalar()
+            if not _SNAPSHOT_ID.match(snapshot_id):
+                raise RuntimeError(f"Unexpected snapshot id: {snapshot_id!r}")
+
+            def run_follower(reader):
+                with bind.connect() as conn:
+                    conn = conn.execution_options(isolation_level="REPEATABLE READ")
+                    with conn.begin():
+                        conn.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+                        return reader(conn)
+
+            if len(readers) == 1:
+                return [readers[0](leader)]
+
+            with ThreadPoolExecutor(max_workers=len(readers) - 1) as pool:
+                futures = [pool.submit(run_follower, reader) for reader in readers[1:]]
+                first = readers[0](leader)
+                return [first] + [f.result() for f in futures]
+
+
+async def run_on_shared_snapshot_async(readers, bind=None):
+    """Async counterpart of run_on_shared_snapshot: readers are coroutines taking an AsyncConnection."""
+    bind = bind or async_engine
+    async with bind.connect() as leader:
+        await leader.execution_options(isolation_level="REPEATABLE READ")
+        async with leader.begin():
+            snapshot_id = (await leader.execute(text("SELECT pg_export_snapshot()"))).scalar()
+            if not _SNAPSHOT_ID.match(snapshot_id):
+                raise RuntimeError(f"Unexpected snapshot id: {snapshot_id!r}")
+
+            async def run_follower(reader):
+                async with bind.connect() as conn:
+                    await conn.execution_options(isolation_level="REPEATABLE READ")
+                    async with conn.begin():
+                        await conn.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+                        return await reader(conn)
+
+            return list(await asyncio.gather(
+                readers[0](leader),
+                *(run_follower(reader) for reader in readers[1:])
+            ))
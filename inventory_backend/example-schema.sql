@@ -196,6 +196,26 @@ ALTER TABLE ONLY public.inventory_units
 ALTER TABLE ONLY public.reconciled_items
     ADD CONSTRAINT reconciled_items_product_id_fkey FOREIGN KEY (product_id) REFERENCES public.products(product_id);
 
+-- Serial and unit_id lookups used by /dashboard/insights/unit-timeline
+CREATE INDEX inventory_units_serial_idx ON public.inventory_units USING btree (serial_number);
+CREATE INDEX inventory_log_serial_idx ON public.inventory_log USING btree (serial_number);
+CREATE INDEX returns_serial_idx ON public.returns USING btree (serial_number);
+CREATE INDEX returns_original_unit_idx ON public.returns USING btree (original_unit_id);
+CREATE INDEX repairs_unit_idx ON public.repairs USING btree (unit_id);
+CREATE INDEX disposals_unit_idx ON public.disposals USING btree (unit_id);
+CREATE INDEX reconciled_items_serial_idx ON public.reconciled_items USING btree (serial_number);
+
+-- Trigram indexes backing /dashboard/insights/search (partial and fuzzy lookups)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX inventory_units_serial_trgm_idx ON public.inventory_units USING gin (serial_number gin_trgm_ops);
+CREATE INDEX inventory_units_po_trgm_idx ON public.inventory_units USING gin (po_number gin_trgm_ops);
+CREATE INDEX returns_serial_trgm_idx ON public.returns USING gin (serial_number gin_trgm_ops);
+CREATE INDEX returns_po_trgm_idx ON public.returns USING gin (po_number gin_trgm_ops);
+CREATE INDEX inventory_log_serial_trgm_idx ON public.inventory_log USING gin (serial_number gin_trgm_ops);
+CREATE INDEX inventory_log_order_trgm_idx ON public.inventory_log USING gin (order_id gin_trgm_ops);
+CREATE INDEX reconciled_items_serial_trgm_idx ON public.reconciled_items USING gin (serial_number gin_trgm_ops);
+
 -- Example Views (safe, generic)
 CREATE VIEW public.view_product_summary AS
 SELECT product_id, part_number, product_name
@@ -205,6 +225,9 @@ CREATE VIEW public.view_serial_summary AS
 SELECT serial_number, po_number
 FROM public.inventory_units;
 
+-- Hot-path, partial and ON CONFLICT indexes are applied by `python -m inventory_backend.migrate upgrade`
+-- (see inventory_backend/migrations); run it after loading this file.
+
 -- Sample GRANT statements (safe)
 GRANT SELECT ON ALL TABLES IN SCHEMA public TO staff_role;
 GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO staff_role;
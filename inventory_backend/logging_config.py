@@ -0,0 +1,175 @@
+import os
+import re
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+LOG_DIR = os.getenv("LOG_DIR", r"C:\Logs" if os.name == "nt" else os.path.join(os.path.dirname(__file__), "logs"))
+LOG_FILE = os.getenv("LOG_FILE", "inventory_backend.log")
+MAX_LOG_SIZE_MB = int(os.getenv("MAX_LOG_SIZE_MB", "100"))
+MAX_LOG_SIZE_BYTES = MAX_LOG_SIZE_MB * 1024 * 1024
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-process log files (name-<pid>.log) untouched for this many days are deleted at startup
+LOG_RETAIN_DAYS = int(os.getenv("LOG_RETAIN_DAYS", "14"))
+# Under NSSM stdout is redirected to a file too; set LOG_TO_CONSOLE=0 to skip it
+LOG_TO_CONSOLE = os.getenv("LOG_TO_CONSOLE", "1") == "1"
+
+request_id = ContextVar("request_id", default=None)
+run_id = ContextVar("run_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra=` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "run_id"}
+
+_listener = None
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamps the caller's request/run IDs on the record before it crosses to the log thread."""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        record.run_id = run_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        """Render the message and traceback now, but keep `extra=` fields as fields for the JSON line."""
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "run_id", None):
+            entry["run_id"] = record.run_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _prune_process_logs(log_file):
+    stem, ext = os.path.splitext(log_file)
+    pattern = re.compile(re.escape(stem) + r"-\d+" + re.escape(ext) + r"(\.\d+)?$")
+    cutoff = time.time() - LOG_RETAIN_DAYS * 86400
+    for name in os.listdir(LOG_DIR):
+        if pattern.match(name):
+            try:
+                if os.path.getmtime(os.path.join(LOG_DIR, name)) < cutoff:
+                    os.remove(os.path.join(LOG_DIR, name))
+            except OSError:
+                pass
+
+
+def setup_logging(log_file=LOG_FILE, per_process=False):
+    """Route all logging through a queue; one background thread does the file/console I/O.
+
+    Processes that run side by side (several API workers, a standby scheduler worker) pass
+    per_process=True so each rotates its own name-<pid>.log; rotating a file another process
+    still has open fails on Windows and loses lines elsewhere.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    formatter = JSONFormatter()
+
+    if per_process:
+        _prune_process_logs(log_file)
+        stem, ext = os.path.splitext(log_file)
+        log_file = f"{stem}-{os.getpid()}{ext}"
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(LOG_DIR, log_file),
+        maxBytes=MAX_LOG_SIZE_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+
+    if LOG_TO_CONSOLE:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(formatter)
+        handlers.append(console)
+
+    log_queue = queue.Queue(-1)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    # uvicorn installs its own stdout handlers; send its records through the queue instead
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers[:] = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+@contextmanager
+def run_context(name):
+    """Give a job run its own correlation ID (e.g. "sync_veeqo_orders-3f2a9c1d")."""
+    token = run_id.set(f"{name}-{uuid.uuid4().hex[:8]}")
+    try:
+        yield run_id.get()
+    finally:
+        run_id.reset(token)
+
+
+class RequestIdMiddleware:
+    """Reuses the caller's X-Request-ID or assigns one, and echoes it on the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64]
+        token = request_id.set(incoming or uuid.uuid4().hex[:12])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", request_id.get().encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
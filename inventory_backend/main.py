@@ -1,26 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from inventory_backend.logging_config import setup_logging, RequestIdMiddleware
 from inventory_backend.scanner.routes import router as scanner_router
 from inventory_backend.dashboard.routes import router as dashboard_router
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
-from inventory_backend.dashboard.routes import sync_veeqo_orders
-from inventory_backend.dashboard.sync_logic import sync_veeqo_orders_job
-from inventory_backend.dashboard.backup import run_backup
-import pytz
+from inventory_backend.worker import TIMEZONE, JOBS, add_jobs, scheduler_lock_connection
 
 import threading
 import time
+import logging
 
-from fastapi.staticfiles import StaticFiles
+from inventory_backend.static import PrecompressedStaticFiles
 from fastapi.responses import FileResponse
 import os
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from inventory_backend.sql_instrumentation import QueryContextMiddleware
+from inventory_backend.database import ReadAfterWriteMiddleware
+from inventory_backend.metrics import MetricsMiddleware, render_metrics, API_WORKERS
+from fastapi.responses import PlainTextResponse
 
-run_backup()
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
-app = FastAPI()
+setup_logging(per_process=API_WORKERS > 1)
+logger = logging.getLogger(__name__)
+
+# Scheduled jobs normally run in the worker (python -m inventory_backend.worker). For a single-process
+# setup, "auto" runs them here in whichever process takes the scheduler lock; "1" always; "0" never
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "0").lower()
+
+
+def _acquire_scheduler_lock():
+    try:
+        return scheduler_lock_connection(wait=False)
+    except Exception:
+        logger.exception("Could not take the scheduler lock")
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if API_WORKERS > 1:
+        logger.warning("Running with %s workers; /metrics is disabled (its counters are per process)", API_WORKERS)
+    scheduler = lock_conn = None
+    if RUN_SCHEDULER == "auto":
+        lock_conn = _acquire_scheduler_lock()
+    if RUN_SCHEDULER == "1" or lock_conn is not None:
+        scheduler = start_scheduler()
+    else:
+        logger.info("Scheduler not started in this process", extra={"run_scheduler": RUN_SCHEDULER})
+
+    yield
+
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    if lock_conn is not None:
+        lock_conn.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,40 +72,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute SQL to the route template and report per-request DB statement counts
+app.add_middleware(QueryContextMiddleware)
+
+# Keep a client's reads on the primary for a few seconds after it writes (no-op without a replica)
+app.add_middleware(ReadAfterWriteMiddleware)
+
+# Per-route request counts, latency histograms and in-flight gauges for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Compress JSON lists and CSV exports; small responses aren't worth the CPU
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+if BrotliMiddleware is not None:
+    # Negotiates br, falls back to gzip for clients that don't accept it
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, quality=4, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=6)
+
+# Outermost, so every log line written while serving a request carries its ID
+app.add_middleware(RequestIdMiddleware)
+
 # Mount the scanner and dashboard routers
 app.include_router(scanner_router, prefix="/scanner")
 app.include_router(dashboard_router, prefix="/dashboard")
 
 
-def start_scheduler():
-    scheduler = BackgroundScheduler(timezone=pytz.timezone("America/Los_Angeles"))
-
-    # Veeqo sync every 1 min
-    scheduler.add_job(sync_veeqo_orders_job, IntervalTrigger(minutes=1))
+@app.get("/metrics")
+def metrics():
+    if API_WORKERS > 1:
+        # Per-process counters would come from a random worker on each scrape; refuse rather than mislead
+        return PlainTextResponse(
+            f"/metrics needs a single-worker API process; API_WORKERS is {API_WORKERS}. "
+            "Run several single-worker instances and scrape each instead.\n",
+            status_code=503,
+        )
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
-    # Daily backup at 4:00 PM
-    scheduler.add_job(run_backup, CronTrigger(hour=16, minute=0))
 
+def start_scheduler():
+    # Same jobs as the worker; a BackgroundScheduler's threads run alongside request handling
+    scheduler = BackgroundScheduler(timezone=TIMEZONE)
+    add_jobs(scheduler)
     scheduler.start()
-    print("Scheduler started: Sync every 1 min, Backup at 4 PM")
-    print("Scheduler started: Sync every 1 min, Backup at 4 PM")
-
-start_scheduler()
+    logger.info("Scheduler started in the API process: %s", ", ".join(name for name, _, _ in JOBS))
+    return scheduler
 
 # === Serve React Frontend ===
 frontend_dist = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "inventory_dashboard", "frontend", "dist"))
-app.mount("/", StaticFiles(directory=frontend_dist, html=True), name="frontend")
+app.mount("/", PrecompressedStaticFiles(directory=frontend_dist, html=True), name="frontend")
 
 # Optional: default to index.html if no route matches (React handles routing)
 @app.get("/{full_path:path}")
 async def serve_react_app():
     return FileResponse(os.path.join(frontend_dist, "index.html"))
 
-LOG_DIR = r"C:\Logs"
-MAX_LOG_SIZE_MB = 100
-MAX_LOG_SIZE_BYTES = MAX_LOG_SIZE_MB * 1024 * 1024
-
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("inventory_backend.main:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    uvicorn.run("inventory_backend.main:app", host="0.0.0.0", port=8000, reload=False, log_config=None,
+                workers=API_WORKERS)
\ No newline at end of file
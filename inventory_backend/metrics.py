@@ -0,0 +1,284 @@
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+import psutil
+from starlette.routing import Match
+
+# API worker processes this deployment runs (WEB_CONCURRENCY is what uvicorn and gunicorn read for
+# --workers). Everything in REGISTRY, the pool stats and SQL histograms live in process memory, so with
+# more than one worker a scrape would only see whichever worker answered it.
+API_WORKERS = int(os.getenv("API_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_process = psutil.Process(os.getpid())
+_started_at = time.time()
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed upper bounds (seconds)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            return self.header() + [
+                f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in self._values.items()
+            ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        with self._lock:
+            return self.header() + [
+                f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in self._values.items()
+            ]
+
+
+class LabeledHistogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, *labels, value):
+        with self._lock:
+            self._values.setdefault(labels, Histogram(self.buckets)).observe(value)
+
+    def render(self):
+        with self._lock:
+            return self.header() + render_histograms(
+                self.name, self.labelnames, list(self._values.items())
+            )
+
+
+def render_histograms(name, labelnames, items):
+    lines = []
+    for labels, h in items:
+        cumulative = 0
+        for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+            cumulative += n
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{name}_bucket{_labels(labelnames, labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labelnames, labels)} {_number(h.sum)}")
+        lines.append(f"{name}_count{_labels(labelnames, labels)} {h.count}")
+    return lines
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = LabeledHistogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served.", ("method", "route"))
+
+# Job runs are not here: they happen in the worker, which records them in scheduler_jobs (_scheduler_lines)
+REGISTRY = [HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_PROGRESS]
+
+
+def route_template(scope):
+    """Path template of the route that will handle this request (e.g. /dashboard/sku-breakdown)."""
+    if "route_template" not in scope:
+        template = "unmatched"
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path", scope["path"]) or "/"
+                break
+        scope["route_template"] = template
+    return scope["route_template"]
+
+
+class MetricsMiddleware:
+    """Request count, latency and in-flight gauges per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, route = scope["method"], route_template(scope)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_LATENCY.observe(method, route, value=time.perf_counter() - start)
+            HTTP_REQUESTS.inc(method, route, str(status["code"]))
+            HTTP_IN_PROGRESS.dec(method, route)
+
+
+def _process_lines():
+    cpu = _process.cpu_times()
+    return [
+        "# HELP process_cpu_seconds_total User and system CPU time.",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {_number(cpu.user + cpu.system)}",
+        "# HELP process_resident_memory_bytes Resident set size.",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {_process.memory_info().rss}",
+        "# HELP process_threads Number of OS threads.",
+        "# TYPE process_threads gauge",
+        f"process_threads {_process.num_threads()}",
+        "# HELP process_start_time_seconds Unix time the process started.",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {_number(_started_at)}",
+    ]
+
+
+def _db_lines():
+    from inventory_backend.database import pool_stats
+    from inventory_backend.sql_instrumentation import context_histograms
+
+    lines = [
+        "# HELP db_statement_duration_seconds SQL statement latency by route or job.",
+        "# TYPE db_statement_duration_seconds histogram",
+    ]
+    lines += render_histograms("db_statement_duration_seconds", ("context",), context_histograms())
+
+    pools = pool_stats()
+    for metric, key, kind in (
+        ("db_pool_size", "size", "gauge"),
+        ("db_pool_checked_out", "checked_out", "gauge"),
+        ("db_pool_overflow", "overflow", "gauge"),
+        ("db_pool_checkouts_total", "checkouts", "counter"),
+        ("db_pool_timeouts_total", "timeouts", "counter"),
+    ):
+        lines += [f"# HELP {metric} Connection pool {key.replace('_', ' ')}.", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{pool="{name}"}} {stats[key]}' for name, stats in pools.items()]
+    return lines
+
+
+def _scheduler_lines():
+    """Job state and worker heartbeats recorded in Postgres by the worker process."""
+    from sqlalchemy import text
+    from inventory_backend.database import get_read_engine
+
+    try:
+        with get_read_engine().connect() as conn:
+            jobs = conn.execute(text("""
+                SELECT job_name, last_status, run_count, failure_count, last_duration_s,
+                       EXTRACT(EPOCH FROM last_success_at) AS last_success
+                FROM scheduler_jobs
+            """)).all()
+            workers = conn.execute(text("""
+                SELECT worker_id, EXTRACT(EPOCH FROM now() - last_seen_at) AS age FROM worker_heartbeats
+            """)).all()
+    except Exception:
+        logger.exception("Could not read scheduler state for /metrics")
+        return []
+
+    lines = []
+    for metric, kind, help_text, value in (
+        ("scheduler_job_runs_total", "counter", "Job runs recorded by the worker.", lambda j: j.run_count),
+        ("scheduler_job_failures_total", "counter", "Job runs that raised.", lambda j: j.failure_count),
+        ("scheduler_job_running", "gauge", "1 while a run is in progress.", lambda j: int(j.last_status == "running")),
+        ("scheduler_job_last_duration_seconds", "gauge", "Run time of the last finished run.", lambda j: j.last_duration_s),
+        ("scheduler_job_last_success_timestamp_seconds", "gauge", "Unix time of the last successful run.",
+         lambda j: j.last_success),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [
+            f"{metric}{_labels(('job',), (j.job_name,))} {_number(float(value(j)))}"
+            for j in jobs if value(j) is not None
+        ]
+    lines += [
+        "# HELP worker_heartbeat_age_seconds Seconds since each worker last checked in.",
+        "# TYPE worker_heartbeat_age_seconds gauge",
+    ]
+    lines += [f"worker_heartbeat_age_seconds{_labels(('worker',), (w.worker_id,))} {_number(float(w.age))}" for w in workers]
+    return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _process_lines()
+    lines += _db_lines()
+    lines += _scheduler_lines()
+    return "\n".join(lines) + "\n"
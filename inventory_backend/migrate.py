@@ -0,0 +1,281 @@
+"""Versioned schema migrations.
+
+    python -m inventory_backend.migrate upgrade   # apply pending migrations
+    python -m inventory_backend.migrate status    # applied/pending/modified, plus invalid indexes
+    python -m inventory_backend.migrate check     # EXPLAIN the hot queries, fail on seq scans of big tables
+
+Migrations are numbered SQL files in inventory_backend/migrations. A file whose first line is
+"-- migrate:no-transaction" runs statement by statement in autocommit, which CREATE INDEX
+CONCURRENTLY requires; everything else runs in a single transaction.
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from inventory_backend.database import DATABASE_URL
+from inventory_backend.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+NO_TRANSACTION = "-- migrate:no-transaction"
+# Arbitrary key so two deploys can't run migrations at the same time
+ADVISORY_LOCK_KEY = 7_340_001
+
+# Tables big enough that a sequential scan on a hot path is a bug (partitions included)
+BIG_TABLES = {"inventory_units", "inventory_log", "manual_review", "untracked_serial_sales", "returns"}
+MIN_FLAGGED_ROWS = 10_000
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+    def statements(self):
+        """Split a no-transaction migration into statements (no $$ bodies allowed there)."""
+        body = "\n".join(line for line in self.sql.splitlines() if not line.strip().startswith("--"))
+        return [s.strip() for s in body.split(";") if s.strip()]
+
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers in " + MIGRATIONS_DIR)
+    return migrations
+
+
+def _engine():
+    # Index builds on the big tables outlive the API's statement timeout, so use a dedicated engine
+    return create_engine(DATABASE_URL, poolclass=NullPool, connect_args={"options": "-c statement_timeout=0"})
+
+
+def _ensure_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            name text NOT NULL,
+            checksum text NOT NULL,
+            applied_at timestamptz NOT NULL DEFAULT now()
+        )
+    """))
+
+
+def _applied(conn):
+    rows = conn.execute(text("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version"))
+    return {row.version: row for row in rows}
+
+
+def upgrade(engine=None):
+    """Apply every pending migration in version order; returns the versions applied."""
+    engine = engine or _engine()
+    done = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            _ensure_table(conn)
+            applied = _applied(conn)
+            for m in load_migrations():
+                if m.version in applied:
+                    if applied[m.version].checksum != m.checksum:
+                        logger.warning("Migration %04d_%s changed after it was applied", m.version, m.name)
+                    continue
+
+                logger.info("Applying migration %04d_%s", m.version, m.name)
+                if m.transactional:
+                    # The session is in autocommit for the advisory lock, so bracket the file explicitly
+                    _run_sql(conn, "BEGIN")
+                    try:
+                        _run_sql(conn, m.sql)
+                        _record(conn, m)
+                    except Exception:
+                        _run_sql(conn, "ROLLBACK")
+                        raise
+                    _run_sql(conn, "COMMIT")
+                else:
+                    for statement in m.statements():
+                        _run_sql(conn, statement)
+                    _record(conn, m)
+                done.append(m.version)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    return done
+
+
+def _run_sql(conn, sql):
+    """Execute migration SQL verbatim. Going through a bare DBAPI cursor with no parameters keeps
+    psycopg2 from reading format() specifiers such as %s, %I and %L as bind placeholders."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(sql)
+    finally:
+        cursor.close()
+
+
+def _record(conn, m):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, checksum) VALUES (:v, :n, :c)"),
+        {"v": m.version, "n": m.name, "c": m.checksum},
+    )
+
+
+def invalid_indexes(conn):
+    """Indexes left INVALID by a failed CREATE INDEX CONCURRENTLY; drop them and re-run upgrade."""
+    return conn.execute(text("""
+        SELECT c.relname
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid
+        ORDER BY c.relname
+    """)).scalars().all()
+
+
+def status(engine=None):
+    """Read-only: a database that was never migrated just shows every migration as pending."""
+    engine = engine or _engine()
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass('schema_migrations') IS NOT NULL")).scalar()
+        applied = _applied(conn) if exists else {}
+        rows = []
+        for m in load_migrations():
+            row = applied.get(m.version)
+            if row is None:
+                state = "pending"
+            elif row.checksum != m.checksum:
+                state = "modified"
+            else:
+                state = f"applied {row.applied_at:%Y-%m-%d %H:%M}"
+            rows.append((m.version, m.name, state))
+        return rows, invalid_indexes(conn)
+
+
+# --- Hot query plan check ---
+
+# (label, SQL, sample parameter query). Kept in step with the router/sync queries they mirror.
+HOT_QUERIES = [
+    ("unit by serial", "SELECT sold FROM inventory_units WHERE serial_number = :sn",
+     "SELECT serial_number AS sn FROM inventory_units WHERE serial_number <> 'NOSER' LIMIT 1"),
+    ("unit by serial incl. archive", "SELECT sold FROM inventory_units_all WHERE serial_number = :sn",
+     "SELECT serial_number AS sn FROM inventory_units WHERE serial_number <> 'NOSER' LIMIT 1"),
+    ("units to archive",
+     "SELECT iu.unit_id FROM inventory_units iu WHERE iu.sold = TRUE AND iu.serial_assigned_at < now() - interval '180 days' "
+     "AND NOT EXISTS (SELECT 1 FROM inventory_log_all il WHERE il.serial_number = iu.serial_number "
+     "AND il.event_time >= now() - interval '180 days') ORDER BY iu.serial_assigned_at LIMIT 5000",
+     None),
+    ("log by order (sync dedup)",
+     "SELECT 1 FROM inventory_log WHERE order_id = :oid AND event_time >= now() - interval '30 days' LIMIT 1",
+     "SELECT order_id AS oid FROM inventory_log LIMIT 1"),
+    ("latest log entries", "SELECT sku, serial_number, order_id, event_time FROM inventory_log ORDER BY event_time DESC LIMIT 100",
+     None),
+    ("log by serial", "SELECT log_id, order_id, event_time FROM inventory_log WHERE serial_number = :sn",
+     "SELECT serial_number AS sn FROM inventory_log LIMIT 1"),
+    ("manual review by order/sku", "SELECT resolved FROM manual_review WHERE order_id = :oid AND sku = :sku",
+     "SELECT order_id AS oid, sku FROM manual_review LIMIT 1"),
+    ("unresolved manual review",
+     "SELECT review_id, order_id, sku, created_at FROM manual_review WHERE resolved = FALSE ORDER BY created_at DESC LIMIT 50",
+     None),
+    ("soft allocation by product", "SELECT SUM(quantity) FROM untracked_serial_sales WHERE product_id = :pid",
+     "SELECT product_id AS pid FROM products LIMIT 1"),
+    ("unsold units by product",
+     "SELECT COUNT(*) FROM inventory_units WHERE product_id = :pid AND sold = FALSE AND serial_number != 'NOSER'",
+     "SELECT product_id AS pid FROM products LIMIT 1"),
+    ("NOSER units", "SELECT unit_id FROM inventory_units WHERE serial_number = 'NOSER' ORDER BY unit_id DESC", None),
+    ("damaged units", "SELECT unit_id FROM inventory_units WHERE is_damaged = TRUE AND sold = FALSE ORDER BY unit_id DESC", None),
+    ("returns by serial", "SELECT return_id FROM returns WHERE serial_number = :sn",
+     "SELECT serial_number AS sn FROM returns LIMIT 1"),
+    ("returns by original unit", "SELECT return_id FROM returns WHERE original_unit_id = :uid",
+     "SELECT unit_id AS uid FROM inventory_units LIMIT 1"),
+]
+
+_PLACEHOLDERS = {"sn": "NO-SUCH-SERIAL", "oid": "NO-SUCH-ORDER", "sku": "no-such-sku", "pid": 0, "uid": 0}
+
+
+def _seq_scans(plan):
+    found = []
+    relation = plan.get("Relation Name", "")
+    if plan.get("Node Type") == "Seq Scan" and any(relation == t or relation.startswith(t + "_") for t in BIG_TABLES):
+        found.append(relation)
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+    return found
+
+
+def check(engine=None, force_index=False):
+    """EXPLAIN each hot query; returns [(label, ok, seq-scanned tables)].
+
+    Run against a seeded, ANALYZEd dataset. With force_index the planner is told to avoid seq scans,
+    which only checks that a usable index exists (useful on a near-empty dev database).
+    """
+    engine = engine or _engine()
+    results = []
+    with engine.begin() as conn:
+        if force_index:
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for label, sql, sample in HOT_QUERIES:
+            params = dict(_PLACEHOLDERS)
+            if sample:
+                row = conn.execute(text(sample)).mappings().first()
+                if row:
+                    params.update(row)
+            plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql), params).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = _seq_scans(plan[0]["Plan"])
+            if scans:
+                # Empty/default partitions are legitimately seq scanned; only flag ones with real data
+                sizes = dict(conn.execute(
+                    text("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(:names)"), {"names": scans}
+                ).all())
+                scans = [name for name in scans if sizes.get(name, 0) >= MIN_FLAGGED_ROWS]
+            results.append((label, not scans, scans))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m inventory_backend.migrate")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("upgrade", help="apply pending migrations")
+    sub.add_parser("status", help="list migrations and invalid indexes")
+    check_parser = sub.add_parser("check", help="verify hot queries use index scans")
+    check_parser.add_argument("--force-index", action="store_true",
+                              help="disable seq scans so small datasets still show whether an index exists")
+    args = parser.parse_args(argv)
+
+    setup_logging(log_file="migrate.log")
+
+    if args.command == "upgrade":
+        applied = upgrade()
+        print(f"Applied {len(applied)} migration(s)" + (f": {applied}" if applied else ""))
+        return 0
+
+    if args.command == "status":
+        rows, invalid = status()
+        for version, name, state in rows:
+            print(f"{version:04d}_{name:<40} {state}")
+        for index in invalid:
+            print(f"INVALID INDEX {index} (drop it and re-run upgrade)")
+        return 1 if invalid or any(state == "modified" for _, _, state in rows) else 0
+
+    results = check(force_index=args.force_index)
+    for label, ok, scans in results:
+        print(f"{'OK  ' if ok else 'FAIL'} {label}" + ("" if ok else f"  (seq scan on {', '.join(scans)})"))
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
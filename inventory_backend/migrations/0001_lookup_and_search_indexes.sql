@@ -0,0 +1,20 @@
+-- migrate:no-transaction
+-- Serial/unit lookups and trigram search indexes that were previously only in example-schema.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_serial_idx ON public.inventory_units USING btree (serial_number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_log_serial_idx ON public.inventory_log USING btree (serial_number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS returns_serial_idx ON public.returns USING btree (serial_number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS returns_original_unit_idx ON public.returns USING btree (original_unit_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS repairs_unit_idx ON public.repairs USING btree (unit_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS disposals_unit_idx ON public.disposals USING btree (unit_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS reconciled_items_serial_idx ON public.reconciled_items USING btree (serial_number);
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_serial_trgm_idx ON public.inventory_units USING gin (serial_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_po_trgm_idx ON public.inventory_units USING gin (po_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS returns_serial_trgm_idx ON public.returns USING gin (serial_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS returns_po_trgm_idx ON public.returns USING gin (po_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_log_serial_trgm_idx ON public.inventory_log USING gin (serial_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_log_order_trgm_idx ON public.inventory_log USING gin (order_id gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS reconciled_items_serial_trgm_idx ON public.reconciled_items USING gin (serial_number gin_trgm_ops);
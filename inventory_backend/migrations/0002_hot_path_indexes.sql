@@ -0,0 +1,24 @@
+-- migrate:no-transaction
+-- Indexes behind the Veeqo sync, scanner and dashboard hot paths
+
+-- "Order already processed?" check and per-order log lookups in the sync
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_log_order_idx ON public.inventory_log USING btree (order_id);
+
+-- Manual review dedup/resolve by (order_id, sku) and the unresolved queue on the dashboard
+CREATE INDEX CONCURRENTLY IF NOT EXISTS manual_review_order_sku_idx ON public.manual_review USING btree (order_id, sku);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS manual_review_unresolved_idx ON public.manual_review USING btree (created_at DESC) WHERE resolved = FALSE;
+
+-- Soft-allocation sums per product
+CREATE INDEX CONCURRENTLY IF NOT EXISTS untracked_serial_sales_product_idx ON public.untracked_serial_sales USING btree (product_id) INCLUDE (quantity);
+
+-- Sellable stock: per-product counts of unsold, serialised units (grouped products, SKU breakdowns, SSD allocation)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_unsold_product_idx ON public.inventory_units USING btree (product_id) INCLUDE (is_damaged)
+    WHERE sold = FALSE AND serial_number <> 'NOSER';
+
+-- Units still waiting for a serial (/scanner/noser-units, bulk NOSER updates)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_noser_idx ON public.inventory_units USING btree (unit_id)
+    WHERE serial_number = 'NOSER';
+
+-- /scanner/damaged-units
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_damaged_unsold_idx ON public.inventory_units USING btree (unit_id)
+    WHERE is_damaged = TRUE AND sold = FALSE;
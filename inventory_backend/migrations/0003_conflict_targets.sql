@@ -0,0 +1,27 @@
+-- ON CONFLICT (serial_number, order_id) in the sync and ON CONFLICT (product_id, order_id) in soft
+-- allocation need a unique index on exactly those columns. Production databases created by hand may
+-- already have one under another name, so only add it when missing.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = 'public.inventory_log'::regclass AND i.indisunique AND i.indpred IS NULL
+          AND ARRAY(SELECT a.attname FROM unnest(i.indkey) k JOIN pg_attribute a
+                    ON a.attrelid = i.indrelid AND a.attnum = k ORDER BY a.attname)::text[]
+              = ARRAY['order_id', 'serial_number']
+    ) THEN
+        CREATE UNIQUE INDEX inventory_log_serial_order_key ON public.inventory_log (serial_number, order_id);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = 'public.untracked_serial_sales'::regclass AND i.indisunique AND i.indpred IS NULL
+          AND ARRAY(SELECT a.attname FROM unnest(i.indkey) k JOIN pg_attribute a
+                    ON a.attrelid = i.indrelid AND a.attnum = k ORDER BY a.attname)::text[]
+              = ARRAY['order_id', 'product_id']
+    ) THEN
+        CREATE UNIQUE INDEX untracked_serial_sales_product_order_key ON public.untracked_serial_sales (product_id, order_id);
+    END IF;
+END
+$$;
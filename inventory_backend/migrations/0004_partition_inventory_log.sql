@@ -0,0 +1,73 @@
+-- Rebuild inventory_log as monthly range partitions on event_time, with an archive parent in the
+-- "archive" schema for partitions detached by the maintenance job (dashboard/partitions.py).
+-- inventory_log_all unions both for audits. Takes an exclusive lock on inventory_log while rows
+-- are copied; run it in a maintenance window.
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+ALTER TABLE public.inventory_log RENAME TO inventory_log_unpartitioned;
+ALTER SEQUENCE public.inventory_log_log_id_seq OWNED BY NONE;
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'inventory_log_pkey') THEN
+        ALTER TABLE public.inventory_log_unpartitioned RENAME CONSTRAINT inventory_log_pkey TO inventory_log_unpartitioned_pkey;
+    END IF;
+END
+$$;
+
+-- LIKE keeps any extra columns a hand-built production table has
+CREATE TABLE public.inventory_log (LIKE public.inventory_log_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (event_time);
+ALTER TABLE public.inventory_log ALTER COLUMN event_time SET NOT NULL;
+ALTER TABLE public.inventory_log ADD CONSTRAINT inventory_log_pkey PRIMARY KEY (log_id, event_time);
+ALTER SEQUENCE public.inventory_log_log_id_seq OWNED BY public.inventory_log.log_id;
+
+CREATE TABLE public.inventory_log_default PARTITION OF public.inventory_log DEFAULT;
+
+CREATE OR REPLACE FUNCTION public.create_inventory_log_partition(month date) RETURNS text AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', month);
+    partition_name text := format('inventory_log_%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass('public.' || partition_name) IS NULL AND to_regclass('archive.' || partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.inventory_log FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_start + interval '1 month'
+        );
+    END IF;
+    RETURN partition_name;
+END
+$$ LANGUAGE plpgsql;
+
+UPDATE public.inventory_log_unpartitioned SET event_time = timestamp '1970-01-01' WHERE event_time IS NULL;
+
+SELECT public.create_inventory_log_partition(month::date)
+FROM generate_series(
+    date_trunc('month', COALESCE((SELECT MIN(event_time) FROM public.inventory_log_unpartitioned
+                                  WHERE event_time > timestamp '1970-01-01'), now())),
+    date_trunc('month', now()) + interval '3 months',
+    interval '1 month'
+) AS month;
+
+INSERT INTO public.inventory_log SELECT * FROM public.inventory_log_unpartitioned;
+DROP TABLE public.inventory_log_unpartitioned;
+
+CREATE INDEX inventory_log_serial_idx ON public.inventory_log USING btree (serial_number);
+CREATE INDEX inventory_log_order_idx ON public.inventory_log USING btree (order_id);
+CREATE INDEX inventory_log_event_time_idx ON public.inventory_log USING btree (event_time);
+CREATE INDEX inventory_log_serial_trgm_idx ON public.inventory_log USING gin (serial_number gin_trgm_ops);
+CREATE INDEX inventory_log_order_trgm_idx ON public.inventory_log USING gin (order_id gin_trgm_ops);
+-- Unique indexes on a partitioned table must include the partition key; the sync writes every
+-- serial of an order with the same shipped time, so this still rejects a re-inserted order
+CREATE UNIQUE INDEX inventory_log_serial_order_key ON public.inventory_log (serial_number, order_id, event_time);
+
+CREATE TABLE archive.inventory_log_archive (LIKE public.inventory_log INCLUDING DEFAULTS)
+    PARTITION BY RANGE (event_time);
+ALTER TABLE archive.inventory_log_archive ADD CONSTRAINT inventory_log_archive_pkey PRIMARY KEY (log_id, event_time);
+CREATE INDEX inventory_log_archive_serial_idx ON archive.inventory_log_archive USING btree (serial_number);
+CREATE INDEX inventory_log_archive_order_idx ON archive.inventory_log_archive USING btree (order_id);
+
+CREATE VIEW public.inventory_log_all AS
+    SELECT * FROM public.inventory_log
+    UNION ALL
+    SELECT * FROM archive.inventory_log_archive;
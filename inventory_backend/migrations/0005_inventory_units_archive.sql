@@ -0,0 +1,22 @@
+-- migrate:no-transaction
+-- Cold table for long-sold units, moved there by the archive job (dashboard/unit_archive.py).
+-- Only the indexes lookups through inventory_units_all need are built; the hot table's partial
+-- NOSER/unsold/damaged indexes would never match a sold unit here and only slow the nightly move.
+-- inventory_units_all is what serial-uniqueness checks and insights lookups read.
+
+CREATE TABLE IF NOT EXISTS public.inventory_units_archive
+    (LIKE public.inventory_units INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+
+ALTER TABLE public.inventory_units_archive ADD CONSTRAINT inventory_units_archive_pkey PRIMARY KEY (unit_id);
+CREATE INDEX IF NOT EXISTS inventory_units_archive_serial_idx ON public.inventory_units_archive USING btree (serial_number);
+CREATE INDEX IF NOT EXISTS inventory_units_archive_serial_trgm_idx ON public.inventory_units_archive USING gin (serial_number gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS inventory_units_archive_po_trgm_idx ON public.inventory_units_archive USING gin (po_number gin_trgm_ops);
+
+CREATE OR REPLACE VIEW public.inventory_units_all AS
+    SELECT * FROM public.inventory_units
+    UNION ALL
+    SELECT * FROM public.inventory_units_archive;
+
+-- Lets the archive job find sold units by age without scanning the hot table
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_units_sold_assigned_idx ON public.inventory_units USING btree (serial_assigned_at)
+    WHERE sold = TRUE;
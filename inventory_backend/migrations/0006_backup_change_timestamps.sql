@@ -0,0 +1,45 @@
+-- Change timestamps for incremental backups (dashboard/backup.py).
+-- Columns are added without a default first so existing rows are not rewritten; NULL means the row
+-- predates this migration and is covered by the next full backup. inventory_log is insert-only, so
+-- the default is enough there; the other tables get a trigger that also stamps updates. Rows reach
+-- archive.inventory_log_archive by ATTACH PARTITION and keep their original updated_at, so the
+-- backup picks those up by partition instead (INVENTORY_LOG_ARCHIVE in dashboard/backup.py).
+
+ALTER TABLE public.inventory_units ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+ALTER TABLE public.inventory_units_archive ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+ALTER TABLE public.manual_review ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+ALTER TABLE public.inventory_log ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+ALTER TABLE archive.inventory_log_archive ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+
+ALTER TABLE public.inventory_units ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE public.inventory_units_archive ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE public.manual_review ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE public.inventory_log ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE archive.inventory_log_archive ALTER COLUMN updated_at SET DEFAULT now();
+
+CREATE OR REPLACE FUNCTION public.set_updated_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END
+$$;
+
+-- The archive table's trigger stamps units as they are moved, so the next delta picks them up
+CREATE TRIGGER inventory_units_set_updated_at BEFORE INSERT OR UPDATE ON public.inventory_units
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER inventory_units_archive_set_updated_at BEFORE INSERT OR UPDATE ON public.inventory_units_archive
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER manual_review_set_updated_at BEFORE INSERT OR UPDATE ON public.manual_review
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+-- Views expand * when created; replace them so the new column shows through
+CREATE OR REPLACE VIEW public.inventory_units_all AS
+    SELECT * FROM public.inventory_units
+    UNION ALL
+    SELECT * FROM public.inventory_units_archive;
+
+CREATE OR REPLACE VIEW public.inventory_log_all AS
+    SELECT * FROM public.inventory_log
+    UNION ALL
+    SELECT * FROM archive.inventory_log_archive;
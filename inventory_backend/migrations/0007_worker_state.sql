@@ -0,0 +1,23 @@
+-- Job state and heartbeats written by the scheduled-job worker (inventory_backend/worker.py) and
+-- read by /metrics on the API processes.
+
+CREATE TABLE IF NOT EXISTS public.scheduler_jobs (
+    job_name text PRIMARY KEY,
+    last_status text NOT NULL,
+    last_started_at timestamptz,
+    last_finished_at timestamptz,
+    last_success_at timestamptz,
+    last_duration_s double precision,
+    last_error text,
+    run_count bigint NOT NULL DEFAULT 0,
+    failure_count bigint NOT NULL DEFAULT 0,
+    worker_id text
+);
+
+CREATE TABLE IF NOT EXISTS public.worker_heartbeats (
+    worker_id text PRIMARY KEY,
+    hostname text NOT NULL,
+    pid integer NOT NULL,
+    started_at timestamptz NOT NULL,
+    last_seen_at timestamptz NOT NULL
+);
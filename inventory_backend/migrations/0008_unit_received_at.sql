@@ -0,0 +1,14 @@
+-- Receipt time for units. serial_assigned_at is overwritten when a serial is scanned, so the unit
+-- timeline had no separate "received" time. Added without a backfill so the table is not rewritten;
+-- NULL means the unit predates this migration and readers fall back to serial_assigned_at.
+
+ALTER TABLE public.inventory_units ADD COLUMN IF NOT EXISTS received_at timestamp;
+ALTER TABLE public.inventory_units_archive ADD COLUMN IF NOT EXISTS received_at timestamp;
+
+ALTER TABLE public.inventory_units ALTER COLUMN received_at SET DEFAULT now();
+ALTER TABLE public.inventory_units_archive ALTER COLUMN received_at SET DEFAULT now();
+
+CREATE OR REPLACE VIEW public.inventory_units_all AS
+    SELECT * FROM public.inventory_units
+    UNION ALL
+    SELECT * FROM public.inventory_units_archive;
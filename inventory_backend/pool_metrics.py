@@ -0,0 +1,88 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Running checkout counters for one pool, keyed by the engine's pool_logging_name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, waited, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, waited):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def as_dict(self):
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+POOL_STATS = {}
+_registry_lock = threading.Lock()
+
+
+def stats_for(name):
+    with _registry_lock:
+        return POOL_STATS.setdefault(name, PoolStats())
+
+
+class _InstrumentedPoolMixin:
+    # Stats live in POOL_STATS rather than on the pool so they survive pool.recreate()
+    def _do_get(self):
+        stats = stats_for(self.logging_name or "default")
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            stats.record_timeout(time.perf_counter() - start)
+            raise
+        # checkedout() already counts this connection; past size() it had to be an overflow connection
+        stats.record_checkout(time.perf_counter() - start, self.checkedout() > self.size())
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(engine):
+    """Live gauges plus cumulative counters for an engine's pool."""
+    pool = engine.pool
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_s": pool.timeout(),
+    }
+    status.update(stats_for(pool.logging_name or "default").as_dict())
+    return status
@@ -0,0 +1,316 @@
+"""Restore and verify backup sets written by dashboard/backup.py.
+
+    python -m inventory_backend.restore list                    # sets on disk
+    python -m inventory_backend.restore verify [SET]            # re-read files, check rows and sha256
+    python -m inventory_backend.restore restore [SET] --database-url URL [--jobs 4] [--truncate]
+
+SET defaults to the newest set. Restoring an incremental set loads its full base and then replays
+every delta up to it. The target should be a scratch database with the schema already applied
+(example-schema.sql, then `migrate upgrade`), reached as a superuser. Triggers and foreign keys are
+off during the load, so tables stream in parallel and change timestamps come back as they were.
+"""
+import io
+import os
+import sys
+import csv
+import time
+import hashlib
+import logging
+import argparse
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from inventory_backend.database import DATABASE_URL
+from inventory_backend.logging_config import setup_logging
+from inventory_backend.dashboard.backup import (
+    BACKUP_ROOT, BACKUP_TABLES, INVENTORY_LOG_ARCHIVE, list_backup_sets, open_backup_file,
+)
+from inventory_backend.dashboard.partitions import _PARTITION_NAME, _add_months
+
+logger = logging.getLogger(__name__)
+
+
+class _HashingReader(io.RawIOBase):
+    """Counts and sha256-hashes the uncompressed bytes as COPY (or the csv module) reads them."""
+
+    def __init__(self, f):
+        super().__init__()
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        data = self.f.readline(size)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return data
+
+
+def _problems(entry, reader, rows):
+    problems = []
+    if rows != entry["rows"]:
+        problems.append(f"{entry['file']}: {rows} rows, manifest says {entry['rows']}")
+    if "sha256" in entry and reader.sha256.hexdigest() != entry["sha256"]:
+        problems.append(f"{entry['file']}: sha256 mismatch")
+    return problems
+
+
+def resolve_chain(name=None, root=BACKUP_ROOT):
+    """Sets needed to restore `name` (default newest): its full base, then each delta up to it."""
+    sets = list_backup_sets(root)
+    if not sets:
+        raise RuntimeError(f"No backup sets in {root}")
+    target = sets[-1] if name is None else next((s for s in sets if s["name"] == name), None)
+    if target is None:
+        raise RuntimeError(f"Backup set {name} not found in {root}")
+    if target["type"] == "full":
+        return [target]
+
+    base = next((s for s in sets if s["name"] == target["base"]), None)
+    if base is None:
+        raise RuntimeError(f"Base set {target['base']} of {target['name']} is missing")
+    deltas = [s for s in sets if s["type"] == "incremental" and s["base"] == base["name"]]
+    return [base] + deltas[:deltas.index(target) + 1]
+
+
+def verify_set(manifest, root=BACKUP_ROOT):
+    """Re-read every file of one set; returns a list of problems (empty when it checks out)."""
+    problems = []
+    for entry in manifest["files"]:
+        path = os.path.join(root, manifest["name"], entry["file"])
+        if not os.path.isfile(path):
+            problems.append(f"{entry['file']}: missing")
+            continue
+        with open_backup_file(path) as f:
+            reader = _HashingReader(f)
+            records = csv.reader(io.TextIOWrapper(reader, encoding="utf-8", newline=""))
+            rows = sum(1 for _ in records) - 1
+        problems += _problems(entry, reader, rows)
+    return problems
+
+
+def _table_steps(chain, table):
+    """(set name, entry) to apply for one table: from its newest full dump onward, deltas before keys."""
+    steps = [(m["name"], e) for m in chain for e in sorted(m["files"], key=lambda e: e["kind"] == "keys")
+             if e["table"] == table]
+    last_full = max(i for i, (_, e) in enumerate(steps) if e["kind"] == "full")
+    return steps[last_full:]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _qualified(table):
+    """Quoted table name from a manifest entry ("inventory_log" or "archive.inventory_log_archive")."""
+    return ".".join(_quote(part) for part in table.split("."))
+
+
+def _load_table(engine, root, chain, table):
+    """Apply one table's files on a dedicated connection; returns load stats and problems."""
+    key = BACKUP_TABLES.get(table)
+    name = _qualified(table)
+    stats = {"table": table, "rows": 0, "bytes": 0, "seconds": 0.0, "problems": []}
+    start = time.perf_counter()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # Skips foreign keys (tables load concurrently) and the updated_at triggers
+        cursor.execute("SET session_replication_role = replica")
+        for set_name, entry in _table_steps(chain, table):
+            with open_backup_file(os.path.join(root, set_name, entry["file"])) as f:
+                reader = _HashingReader(f)
+                columns = ", ".join(_quote(c) for c in next(csv.reader([reader.readline().decode("utf-8")])))
+
+                if entry["kind"] == "full":
+                    cursor.copy_expert(f"COPY {name} ({columns}) FROM STDIN WITH (FORMAT csv)", reader)
+                    rows = cursor.rowcount
+                elif entry["kind"] == "delta":
+                    cursor.execute(f"CREATE TEMP TABLE restore_stage (LIKE {name}) ON COMMIT DROP")
+                    cursor.copy_expert(f"COPY restore_stage ({columns}) FROM STDIN WITH (FORMAT csv)", reader)
+                    rows = cursor.rowcount
+                    cursor.execute(f"DELETE FROM {name} t USING restore_stage s WHERE t.{key} = s.{key}")
+                    cursor.execute(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM restore_stage")
+                else:
+                    cursor.execute(f"CREATE TEMP TABLE restore_keys ON COMMIT DROP AS SELECT {key} FROM {name} WITH NO DATA")
+                    cursor.copy_expert(f"COPY restore_keys ({columns}) FROM STDIN WITH (FORMAT csv)", reader)
+                    rows = cursor.rowcount
+                    # Rows deleted since the previous set
+                    cursor.execute(f"""
+                        DELETE FROM {name} t
+                        WHERE NOT EXISTS (SELECT 1 FROM restore_keys k WHERE k.{key} = t.{key})
+                    """)
+                raw.commit()
+
+            stats["problems"] += _problems(entry, reader, rows)
+            if entry["kind"] != "keys":
+                stats["rows"] += rows
+            stats["bytes"] += reader.bytes
+    finally:
+        raw.close()
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _expected_counts(chain):
+    """Row count each table should end with: its last full dump, or the last key list after deltas.
+
+    Sets written before every delta came with a key list only have the delta; its rows are counted
+    as additions, which is what the archive table's deltas (newly attached partitions) were.
+    """
+    expected = {}
+    for manifest in chain:
+        keyed = {e["table"] for e in manifest["files"] if e["kind"] == "keys"}
+        for entry in manifest["files"]:
+            if entry["kind"] in ("full", "keys"):
+                expected[entry["table"]] = entry["rows"]
+            elif entry["table"] not in keyed:
+                expected[entry["table"]] = expected.get(entry["table"], 0) + entry["rows"]
+    return expected
+
+
+def _reset_sequences(conn, tables):
+    rows = conn.execute(text("""
+        SELECT c.oid::regclass::text AS table_name, a.attname AS column_name,
+               pg_get_serial_sequence(c.oid::regclass::text, a.attname) AS seq
+        FROM pg_class c
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE c.oid = ANY(CAST(:tables AS regclass[]))
+          AND pg_get_serial_sequence(c.oid::regclass::text, a.attname) IS NOT NULL
+    """), {"tables": tables}).all()
+    for r in rows:
+        conn.execute(
+            text(f"SELECT setval(:seq, COALESCE((SELECT max({_quote(r.column_name)}) FROM {r.table_name}), 0) + 1, false)"),
+            {"seq": r.seq},
+        )
+
+
+def _create_archive_partitions(conn, chain):
+    """The archive parent has no default partition, so each archived month must exist before its rows load."""
+    for name in sorted({p for m in chain for p in m.get("archive_partitions", [])}):
+        match = _PARTITION_NAME.match(name)
+        if not match or conn.execute(text("SELECT to_regclass(:t)"), {"t": f"archive.{name}"}).scalar():
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        conn.execute(text(
+            f"CREATE TABLE archive.{name} PARTITION OF {INVENTORY_LOG_ARCHIVE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        ))
+
+
+def restore(chain, database_url, root=BACKUP_ROOT, jobs=4, truncate=False):
+    """Load a chain of sets into database_url; returns (per-table stats, problems, elapsed seconds)."""
+    tables = sorted({e["table"] for m in chain for e in m["files"]})
+    engine = create_engine(database_url, poolclass=NullPool, connect_args={"options": "-c statement_timeout=0"})
+    start = time.perf_counter()
+
+    with engine.begin() as conn:
+        missing = [t for t in tables if conn.execute(text("SELECT to_regclass(:t)"), {"t": t}).scalar() is None]
+        if missing:
+            raise RuntimeError(f"Target is missing tables {missing}; apply the schema and migrations first")
+        if INVENTORY_LOG_ARCHIVE in tables:
+            _create_archive_partitions(conn, chain)
+        if truncate:
+            conn.execute(text(f"TRUNCATE {', '.join(_qualified(t) for t in tables)}"))
+        else:
+            occupied = [t for t in tables if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {_qualified(t)})")).scalar()]
+            if occupied:
+                raise RuntimeError(f"Target tables are not empty: {occupied} (pass --truncate)")
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        stats = list(pool.map(lambda t: _load_table(engine, root, chain, t), tables))
+
+    problems = [p for s in stats for p in s["problems"]]
+    expected = _expected_counts(chain)
+    with engine.begin() as conn:
+        _reset_sequences(conn, tables)
+        for table in tables:
+            count = conn.execute(text(f"SELECT count(*) FROM {_qualified(table)}")).scalar()
+            if count != expected[table]:
+                problems.append(f"{table}: {count} rows after restore, expected {expected[table]}")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+    elapsed = time.perf_counter() - start
+    logger.info("Restored %s", chain[-1]["name"], extra={
+        "rows": sum(s["rows"] for s in stats), "seconds": round(elapsed, 1), "problems": len(problems),
+    })
+    return stats, problems, elapsed
+
+
+def print_report(stats, elapsed):
+    header = f"{'table':<32}{'rows':>12}{'MB':>10}{'seconds':>10}{'rows/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for s in sorted(stats, key=lambda s: s["seconds"], reverse=True):
+        rate = s["rows"] / s["seconds"] if s["seconds"] else 0
+        print(f"{s['table']:<32}{s['rows']:>12}{s['bytes'] / 1e6:>10.1f}{s['seconds']:>10.1f}{rate:>12.0f}")
+    rows = sum(s["rows"] for s in stats)
+    mb = sum(s["bytes"] for s in stats) / 1e6
+    print(f"\nRestored {rows} rows ({mb:.1f} MB) in {elapsed:.1f}s: {rows / elapsed:.0f} rows/s, {mb / elapsed:.1f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m inventory_backend.restore")
+    parser.add_argument("--backup-dir", default=BACKUP_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list backup sets")
+    verify_parser = sub.add_parser("verify", help="check a set and its base against their manifests")
+    verify_parser.add_argument("set", nargs="?")
+    restore_parser = sub.add_parser("restore", help="load a set into a scratch database")
+    restore_parser.add_argument("set", nargs="?")
+    restore_parser.add_argument("--database-url", required=True)
+    restore_parser.add_argument("--jobs", type=int, default=4, help="tables loaded at once")
+    restore_parser.add_argument("--truncate", action="store_true", help="empty the target tables first")
+    restore_parser.add_argument("--force", action="store_true", help="allow the configured DATABASE_URL as target")
+    args = parser.parse_args(argv)
+
+    setup_logging(log_file="restore.log")
+
+    if args.command == "list":
+        for s in list_backup_sets(args.backup_dir):
+            rows = sum(f["rows"] for f in s["files"] if f["kind"] != "keys")
+            print(f"{s['name']:<36} {s['type']:<12} {rows:>12} rows" + (f"  base {s['base']}" if s["base"] else ""))
+        return 0
+
+    chain = resolve_chain(args.set, args.backup_dir)
+
+    if args.command == "verify":
+        failed = False
+        for manifest in chain:
+            problems = verify_set(manifest, args.backup_dir)
+            print(f"{'OK  ' if not problems else 'FAIL'} {manifest['name']}")
+            for problem in problems:
+                print(f"     {problem}")
+            failed = failed or bool(problems)
+        return 1 if failed else 0
+
+    if make_url(args.database_url) == make_url(DATABASE_URL) and not args.force:
+        parser.error("--database-url is the live database; restore into a scratch database (or pass --force)")
+    print(f"Restoring {' -> '.join(m['name'] for m in chain)}")
+    stats, problems, elapsed = restore(chain, args.database_url, args.backup_dir, args.jobs, args.truncate)
+    print_report(stats, elapsed)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
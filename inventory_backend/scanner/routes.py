@@ -3,12 +3,15 @@ from pydantic import BaseModel
 from sqlalchemy import text
 from datetime import datetime
 from typing import Optional, List
-from ..database import engine
+from ..database import engine, async_engine
+from ..serialization import rows_response
 from ..security import verify_password
-import traceback
+from ..dashboard.unit_archive import RESTORE_ARCHIVED_UNIT
 import re
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class LoginRequest(BaseModel):
     username: str
@@ -86,6 +89,14 @@ class LogUntrackedSaleRequest(BaseModel):
     order_id: str
     quantity: int
 
+class SerialAssignment(BaseModel):
+    unit_id: int
+    serial: str
+
+class AssignSerialsRequest(BaseModel):
+    assignments: List[SerialAssignment]
+    user_id: int
+
 class ManualOrderPayload(BaseModel):
     product_id: int
     quantity: int
@@ -97,9 +108,9 @@ def scanner_ping():
     return {"scanner": "pong"}
 
 @router.get("/db-ping")
-def db_ping():
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT 1"))
+async def db_ping():
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text("SELECT 1"))
         return {"db": "connected", "result": result.scalar()}
 
 @router.post("/login")
@@ -120,7 +131,7 @@ def login(req: LoginRequest):
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @router.get("/noser-units")
-def get_noser_units():
+async def get_noser_units():
     try:
         query = text("""
             SELECT 
@@ -141,36 +152,38 @@ def get_noser_units():
             WHERE iu.serial_number = 'NOSER'
             ORDER BY iu.unit_id DESC
         """)
-        with engine.connect() as conn:
-            result = conn.execute(query).mappings().all()
-            return result
+        async with async_engine.connect() as conn:
+            return rows_response(await conn.execute(query))
     except Exception as e:
-        print("ERROR in /noser-units:", str(e))
+        logger.exception("Error in /noser-units")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.post("/assign-serial")
-def assign_serial(
+async def assign_serial(
     unit_id: int = Body(...),
     new_serial: str = Body(...),
     user_id: int = Body(...)
 ):
-    print(f"User {user_id} assigning serial '{new_serial}' -> unit {unit_id}")
+    logger.info(
+        "User %s assigning serial %r -> unit %s", user_id, new_serial, unit_id,
+        extra={"user_id": user_id, "unit_id": unit_id, "serial_number": new_serial},
+    )
 
     try:
-        with engine.begin() as conn:
-            # Step 1: Check if serial already exists
-            existing = conn.execute(
-                text("SELECT 1 FROM inventory_units WHERE serial_number = :sn"),
+        async with async_engine.begin() as conn:
+            # Step 1: Check if serial already exists (archived sold units included)
+            existing = (await conn.execute(
+                text("SELECT 1 FROM inventory_units_all WHERE serial_number = :sn"),
                 {"sn": new_serial}
-            ).fetchone()
+            )).fetchone()
             if existing:
                 raise HTTPException(status_code=400, detail="Serial number already exists.")
 
             # Step 2: Get required SN prefix for this unit
-            result = conn.execute(
+            result = (await conn.execute(
                 text("SELECT sn_prefix FROM inventory_units WHERE unit_id = :unit_id"),
                 {"unit_id": unit_id}
-            ).fetchone()
+            )).fetchone()
 
             if result is None:
                 raise HTTPException(status_code=404, detail="Unit not found.")
@@ -185,7 +198,7 @@ def assign_serial(
                 )
 
             # Step 4: Assign the serial
-            conn.execute(
+            await conn.execute(
                 text("""
                     UPDATE inventory_units
                     SET serial_number       = :sn,
@@ -203,13 +216,87 @@ def assign_serial(
         raise  # re-raise known HTTP errors
 
     except Exception as e:
-        print("ERROR in /assign-serial:", str(e))
+        logger.exception("Error in /assign-serial")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
 
+MAX_SERIALS_PER_BATCH = 1000
+
+
+@router.post("/assign-serials")
+async def assign_serials(req: AssignSerialsRequest):
+    """Assign a pallet of serials at once: one validation query, one UPDATE, a result per item."""
+    if not req.assignments:
+        raise HTTPException(status_code=400, detail="No assignments given.")
+    if len(req.assignments) > MAX_SERIALS_PER_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIALS_PER_BATCH} assignments per batch.")
+
+    unit_ids = [a.unit_id for a in req.assignments]
+    serials = [a.serial for a in req.assignments]
+    logger.info(
+        "User %s assigning %s serials", req.user_id, len(serials),
+        extra={"user_id": req.user_id, "count": len(serials)},
+    )
+
+    try:
+        async with async_engine.begin() as conn:
+            # Unit prefix and serial uniqueness (archived sold units included) for the whole batch
+            checks = (await conn.execute(text("""
+                SELECT a.idx, iu.unit_id IS NOT NULL AS unit_found, iu.sn_prefix,
+                       EXISTS (SELECT 1 FROM inventory_units_all x WHERE x.serial_number = a.sn) AS taken
+                FROM unnest(CAST(:unit_ids AS integer[]), CAST(:serials AS text[]))
+                     WITH ORDINALITY AS a(unit_id, sn, idx)
+                LEFT JOIN inventory_units iu ON iu.unit_id = a.unit_id
+                ORDER BY a.idx
+            """), {"unit_ids": unit_ids, "serials": serials})).fetchall()
+
+            results = []
+            # Serials compare exactly, as in /assign-serial and the indexed lookup above
+            seen_units, seen_serials = set(), set()
+            for item, check in zip(req.assignments, checks):
+                if item.unit_id in seen_units:
+                    error = "Unit appears more than once in this batch."
+                elif item.serial in seen_serials:
+                    error = "Serial appears more than once in this batch."
+                elif check.taken:
+                    error = "Serial number already exists."
+                elif not check.unit_found:
+                    error = "Unit not found."
+                elif check.sn_prefix and not item.serial.upper().startswith(check.sn_prefix.upper()):
+                    error = f"Serial must start with '{check.sn_prefix}'"
+                else:
+                    error = None
+                seen_units.add(item.unit_id)
+                seen_serials.add(item.serial)
+                results.append({"unit_id": item.unit_id, "serial": item.serial, "success": error is None, "error": error})
+
+            valid = [r for r in results if r["success"]]
+            if valid:
+                await conn.execute(text("""
+                    UPDATE inventory_units iu
+                    SET serial_number       = v.sn,
+                        assigned_by_user_id = :user_id,
+                        serial_assigned_at  = NOW()
+                    FROM unnest(CAST(:unit_ids AS integer[]), CAST(:serials AS text[])) AS v(unit_id, sn)
+                    WHERE iu.unit_id = v.unit_id
+                """), {
+                    "user_id": req.user_id,
+                    "unit_ids": [r["unit_id"] for r in valid],
+                    "serials": [r["serial"] for r in valid],
+                })
+
+        return {"success": len(valid) == len(results), "assigned": len(valid), "results": results}
+
+    except HTTPException:
+        raise
+
+    except Exception:
+        logger.exception("Error in /assign-serials")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
 @router.get("/products")
-def get_product_list():
+async def get_product_list():
     try:
         query = text("""
             SELECT 
@@ -225,15 +312,14 @@ def get_product_list():
             JOIN master_skus m ON p.master_sku_id = m.master_sku_id
             ORDER BY m.master_sku_id, p.part_number
         """)
-        with engine.connect() as conn:
-            result = conn.execute(query).mappings().all()
-            return result
+        async with async_engine.connect() as conn:
+            return rows_response(await conn.execute(query))
     except Exception as e:
-        print("ERROR in /products:", str(e))
+        logger.exception("Error in /products")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.post("/add-delivery")
-def add_delivery(
+async def add_delivery(
     product_id: int = Body(...),
     quantity: int = Body(...),
     user_id: int = Body(...),
@@ -254,11 +340,11 @@ def add_delivery(
         raise HTTPException(status_code=400, detail="SN prefix must be 2 alphanumeric characters.")
 
     try:
-        with engine.begin() as conn:
-            conn.execute(
+        async with async_engine.begin() as conn:
+            await conn.execute(
                 text("""
                     INSERT INTO inventory_units (product_id, serial_number, po_number, sn_prefix, is_damaged)
-                    SELECT :product_id, 'NOSER', :po_number, :sn_prefix, :is_damaged
+                    SELECT CAST(:product_id AS integer), 'NOSER', :po_number, :sn_prefix, CAST(:is_damaged AS boolean)
                     FROM generate_series(1, :qty)
                 """),
                 {
@@ -273,7 +359,7 @@ def add_delivery(
         return {"success": True}
 
     except Exception as e:
-        print("ERROR in /add-delivery:", str(e))
+        logger.exception("Error in /add-delivery")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
@@ -311,7 +397,7 @@ def get_categories():
             result = conn.execute(query).mappings().all()
             return result
     except Exception as e:
-        print("ERROR in /categories:", str(e))
+        logger.exception("Error in /categories")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/brands")
@@ -326,7 +412,7 @@ def get_brands():
             result = conn.execute(query).mappings().all()
             return result
     except Exception as e:
-        print("ERROR in /brands:", str(e))
+        logger.exception("Error in /brands")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
@@ -377,8 +463,7 @@ def add_product(data: NewProduct):
         return {"success": True}
 
     except Exception as e:
-        print("ERROR in /add-product:", str(e))
-        traceback.print_exc()
+        logger.exception("Error in /add-product")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
@@ -394,7 +479,7 @@ def get_master_skus():
                 result = conn.execute(query).mappings().all()
                 return result
         except Exception as e:
-            print("ERROR in /master-skus:", str(e))
+            logger.exception("Error in /master-skus")
             raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/manual-review")
@@ -410,7 +495,7 @@ def get_manual_review(resolved: bool = False):
             result = conn.execute(query, {"resolved": resolved}).mappings().all()
             return result
     except Exception as e:
-        print("ERROR in /manual-review:",str(e))
+        logger.exception("Error in /manual-review")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.post("/manual-review/resolve")
@@ -490,7 +575,7 @@ def fix_serial_status(req: FixSerialStatusRequest):
         return {"success": True}
 
     except Exception as e:
-        print("ERROR in /fix-serial-status:", str(e))
+        logger.exception("Error in /fix-serial-status")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.post("/insert-inventory-log")
@@ -514,19 +599,22 @@ def insert_inventory_log(req: LogSaleRequest):
         return {"success": True}
 
     except Exception as e:
-        print("ERROR in /insert-inventory-log:", str(e))
+        logger.exception("Error in /insert-inventory-log")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.post("/handle-return-scan")
-def handle_return_scan(
+async def handle_return_scan(
     scanned_serial: str = Body(...),
     placeholder_unit_id: int = Body(...),
     user_id: int = Body(...)
 ):
     try:
-        with engine.begin() as conn:
+        async with async_engine.begin() as conn:
+            # Returned units come back to the hot table if they were archived
+            await conn.execute(RESTORE_ARCHIVED_UNIT, {"sn": scanned_serial})
+
             # Step 1: Find the existing unit by serial
-            original = conn.execute(text("""
+            original = (await conn.execute(text("""
                 SELECT iu.unit_id, iu.product_id, iu.serial_number, iu.serial_assigned_at,
                        iu.assigned_by_user_id, iu.po_number, iu.sn_prefix, iu.sold,
                        m.master_sku_id
@@ -534,19 +622,19 @@ def handle_return_scan(
                 JOIN products p ON iu.product_id = p.product_id
                 JOIN master_skus m ON p.master_sku_id = m.master_sku_id
                 WHERE iu.serial_number = :sn
-            """), {"sn": scanned_serial}).fetchone()
+            """), {"sn": scanned_serial})).fetchone()
 
             if not original:
                 raise HTTPException(status_code=404, detail="Serial number not found.")
 
             # Step 2: Verify master SKU match
-            placeholder = conn.execute(text("""
+            placeholder = (await conn.execute(text("""
                 SELECT iu.unit_id, p.product_id, m.master_sku_id
                 FROM inventory_units iu
                 JOIN products p ON iu.product_id = p.product_id
                 JOIN master_skus m ON p.master_sku_id = m.master_sku_id
                 WHERE iu.unit_id = :unit_id AND iu.serial_number = 'NOSER'
-            """), {"unit_id": placeholder_unit_id}).fetchone()
+            """), {"unit_id": placeholder_unit_id})).fetchone()
 
             if not placeholder:
                 raise HTTPException(status_code=400, detail="Placeholder NOSER unit not found.")
@@ -555,7 +643,7 @@ def handle_return_scan(
                 raise HTTPException(status_code=400, detail="Master SKU mismatch between scanned unit and placeholder.")
 
             # Step 3: Archive original unit to returns table
-            conn.execute(text("""
+            await conn.execute(text("""
                 INSERT INTO returns (
                     original_unit_id, product_id, serial_number, serial_assigned_at,
                     assigned_by_user_id, po_number, sn_prefix, sold
@@ -575,7 +663,7 @@ def handle_return_scan(
             })
 
             # Step 4: Update original unit as returned
-            conn.execute(text("""
+            await conn.execute(text("""
                 UPDATE inventory_units
                 SET sold = FALSE,
                     serial_assigned_at = NOW(),
@@ -584,7 +672,7 @@ def handle_return_scan(
             """), {"unit_id": original.unit_id})
 
             # Step 5: Remove the NOSER placeholder
-            conn.execute(text("""
+            await conn.execute(text("""
                 DELETE FROM inventory_units WHERE unit_id = :uid
             """), {"uid": placeholder.unit_id})
 
@@ -593,7 +681,7 @@ def handle_return_scan(
     except HTTPException:
         raise
     except Exception as e:
-        print("ERROR in /handle-return-scan:", str(e))
+        logger.exception("Error in /handle-return-scan")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.post("/clear-inventory-log")
@@ -606,8 +694,9 @@ def clear_inventory_log(req: ClearLogRequest):
                 WHERE order_id = :oid
             """), {"oid": req.order_id}).fetchall()
 
-            # Step 2: Mark those serials as unsold
+            # Step 2: Mark those serials as unsold, restoring any that were archived
             for row in results:
+                conn.execute(RESTORE_ARCHIVED_UNIT, {"sn": row.serial_number})
                 conn.execute(text("""
                     UPDATE inventory_units SET sold = FALSE
                     WHERE serial_number = :sn
@@ -621,7 +710,7 @@ def clear_inventory_log(req: ClearLogRequest):
         return {"success": True, "cleared": len(results)}
 
     except Exception as e:
-        print("ERROR in /clear-inventory-log:", str(e))
+        logger.exception("Error in /clear-inventory-log")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.post("/create-master-sku")
@@ -651,7 +740,7 @@ def create_master_sku(data: NewMasterSKU):
     except HTTPException:
         raise
     except Exception as e:
-        print("ERROR in /create-master-sku:", str(e))
+        logger.exception("Error in /create-master-sku")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.post("/create-user")
@@ -676,7 +765,7 @@ def create_user(data: NewUser):
             )
         return {"success": True}
     except Exception as e:
-        print("Create user error:", e)
+        logger.exception("Error in /create-user")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/ssds")
@@ -686,7 +775,7 @@ def get_ssd_types():
             result = conn.execute(text("SELECT ssd_id, label FROM ssds ORDER BY ssd_id"))
             return result.mappings().all()
     except Exception as e:
-        print("ERROR in /ssds:", str(e))
+        logger.exception("Error in /ssds")
         raise HTTPException(status_code=500, detail="Failed to fetch SSD types")
 
 @router.post("/dispose-unit")
@@ -720,11 +809,11 @@ def dispose_unit(req: DisposalRequest):
         return {"success": True}
 
     except Exception as e:
-        print("ERROR in /dispose-unit:", str(e))
+        logger.exception("Error in /dispose-unit")
         raise HTTPException(status_code=500, detail="Failed to mark disposal")
 
 @router.get("/damaged-units")
-def get_damaged_units():
+async def get_damaged_units():
     try:
         query = text("""
             SELECT 
@@ -739,12 +828,10 @@ def get_damaged_units():
             WHERE iu.is_damaged = TRUE AND iu.sold = FALSE
             ORDER BY iu.unit_id DESC
         """)
-        with engine.connect() as conn:
-            rows = conn.execute(query).mappings().all()
-            return list(rows)
+        async with async_engine.connect() as conn:
+            return rows_response(await conn.execute(query))
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in /damaged-units")
         raise HTTPException(status_code=500, detail="Failed to fetch damaged units")
 
 
@@ -799,7 +886,7 @@ def mark_repaired(req: RepairRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print("ERROR in /mark-repaired:", str(e))
+        logger.exception("Error in /mark-repaired")
         raise HTTPException(status_code=500, detail="Failed to mark item as repaired")
 
 @router.post("/update-unit-meta")
@@ -834,7 +921,7 @@ def update_unit_meta(data: UpdateUnitMeta):
 
         return {"success": True}
     except Exception as e:
-        print("ERROR in /update-unit-meta:", str(e))
+        logger.exception("Error in /update-unit-meta")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
@@ -869,7 +956,7 @@ def bulk_update_units(req: BulkUpdateRequest):
             result = conn.execute(text(query), params)
             return {"success": True, "updated": result.rowcount}
     except Exception as e:
-        print("Bulk update error:", e)
+        logger.exception("Error in /bulk-update-units")
         raise HTTPException(status_code=500, detail="Bulk update failed.")
 
 @router.get("/reconciled-items")
@@ -885,7 +972,7 @@ def get_reconciled_items():
         with engine.connect() as conn:
             return conn.execute(query).mappings().all()
     except Exception as e:
-        print("ERROR in /reconciled-items:", str(e))
+        logger.exception("Error in /reconciled-items")
         raise HTTPException(status_code=500, detail="Failed to fetch reconciled items")
 
 @router.post("/reconciled-items")
@@ -901,7 +988,7 @@ def create_reconciled_item(data: NewReconciledItem):
             )
         return {"success": True}
     except Exception as e:
-        print("ERROR in POST /reconciled-items:", str(e))
+        logger.exception("Error in POST /reconciled-items")
         raise HTTPException(status_code=500, detail="Failed to add reconciled item")
 
 @router.post("/reconcile-from-existing")
@@ -911,7 +998,7 @@ def reconcile_from_existing(data: ReconcileFromExisting):
             # Lookup product by serial
             row = conn.execute(
                 text("""
-                    SELECT product_id FROM inventory_units
+                    SELECT product_id FROM inventory_units_all
                     WHERE serial_number = :sn
                 """), {"sn": data.serial_number}
             ).fetchone()
@@ -931,7 +1018,7 @@ def reconcile_from_existing(data: ReconcileFromExisting):
     except HTTPException:
         raise
     except Exception as e:
-        print("ERROR in /reconcile-from-existing:", str(e))
+        logger.exception("Error in /reconcile-from-existing")
         raise HTTPException(status_code=500, detail="Failed to reconcile from existing unit")
 
 @router.post("/reconciled-items/resolve")
@@ -946,7 +1033,7 @@ def resolve_reconciled_item(req: ResolveReconciledRequest):
                 raise HTTPException(status_code=404, detail="Reconciled item not found")
         return {"success": True}
     except Exception as e:
-        print("ERROR resolving reconciled item:", str(e))
+        logger.exception("Error resolving reconciled item")
         raise HTTPException(status_code=500, detail="Failed to resolve reconciled item")
 
 @router.post("/mark-damaged")
@@ -990,7 +1077,7 @@ def mark_damaged_unit(req: DamageRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print("ERROR in /mark-damaged:", str(e))
+        logger.exception("Error in /mark-damaged")
         raise HTTPException(status_code=500, detail="Failed to mark unit as damaged")
 
 @router.post("/log-untracked-sale")
@@ -1009,7 +1096,7 @@ def log_untracked_sale(req: LogUntrackedSaleRequest):
             )
         return {"success": True}
     except Exception as e:
-        print("ERROR in /log-untracked-sale:", str(e))
+        logger.exception("Error in /log-untracked-sale")
         raise HTTPException(status_code=500, detail="Failed to log untracked serial sale")
     
 @router.post("/manual-order")
@@ -1023,7 +1110,7 @@ def create_manual_order(order: ManualOrderPayload):
                 raise HTTPException(status_code=400, detail="Order ID already exists.")
 
             for serial in order.serials:
-                row = conn.execute(text("SELECT sold FROM inventory_units WHERE serial_number = :s"),
+                row = conn.execute(text("SELECT sold FROM inventory_units_all WHERE serial_number = :s"),
                                    {"s": serial}).fetchone()
                 if not row:
                     raise HTTPException(status_code=400, detail=f"Serial {serial} not found.")
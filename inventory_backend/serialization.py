@@ -0,0 +1,31 @@
+import decimal
+import orjson
+from fastapi.responses import Response
+
+
+def _default(obj):
+    # Match jsonable_encoder: whole-number Decimals (COUNT/SUM results) become ints
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson, bypassing FastAPI's jsonable_encoder pass."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(result):
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def rows_response(result):
+    return FastJSONResponse(rows_to_dicts(result))
@@ -0,0 +1,274 @@
+import os
+import re
+import time
+import logging
+import functools
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from inventory_backend.logging_config import run_context
+from inventory_backend.metrics import Histogram, route_template
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this land in the slow-query log
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+# Re-run slow SELECTs under EXPLAIN (ANALYZE, BUFFERS) in a background thread
+SQL_EXPLAIN_SLOW = os.getenv("SQL_EXPLAIN_SLOW", "0") == "1"
+SLOW_LOG_SIZE = 200
+MAX_TRACKED_STATEMENTS = 1000
+
+
+class QueryContext:
+    """Who is running SQL right now (route template or job name) plus per-request totals."""
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_current = ContextVar("sql_context", default=None)
+_explaining = ContextVar("sql_explaining", default=False)
+
+_lock = threading.Lock()
+_statements = {}
+_by_context = {}
+slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+
+@contextmanager
+def sql_context(label):
+    """Attribute every statement executed inside the block to `label` (e.g. "job:run_backup")."""
+    token = _current.set(QueryContext(label))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def current_context():
+    return _current.get()
+
+
+def instrumented_job(name):
+    """Decorator for scheduler jobs: attributes their SQL to "job:<name>" and tags logs with a run ID.
+
+    Run time and outcome are recorded by the worker's tracked() wrapper in scheduler_jobs.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with run_context(name), sql_context(f"job:{name}"):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+def _fingerprint(statement):
+    return " ".join(statement.split())
+
+
+def _redact(parameters):
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [_redact(p) for p in parameters[:5]]
+        return [type(v).__name__ for v in parameters]
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if _explaining.get():
+        return
+
+    ctx = _current.get()
+    label = ctx.label if ctx else "unattributed"
+    if ctx:
+        ctx.statements += 1
+        ctx.seconds += elapsed
+    rows = max(cursor.rowcount or 0, 0)
+    key = _fingerprint(statement)
+
+    with _lock:
+        stats = _statements.get(key)
+        if stats is None and len(_statements) < MAX_TRACKED_STATEMENTS:
+            stats = _statements[key] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "rows": 0, "contexts": set()}
+        if stats is not None:
+            stats["calls"] += 1
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], elapsed)
+            stats["rows"] += rows
+            stats["contexts"].add(label)
+        _by_context.setdefault(label, Histogram()).observe(elapsed)
+
+    if elapsed * 1000 >= SQL_SLOW_MS:
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(elapsed * 1000, 1),
+            "rows": rows,
+            "context": label,
+            "statement": key,
+            "parameters": _redact(parameters),
+        }
+        slow_log.append(entry)
+        logger.warning(
+            "Slow SQL: %sms in %s", entry["duration_ms"], label,
+            extra={"duration_ms": entry["duration_ms"], "context": label, "statement": key[:500]},
+        )
+        if SQL_EXPLAIN_SLOW and not executemany:
+            _queue_explain(entry, conn.engine.pool.logging_name, statement, parameters, context.dialect.paramstyle)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+# --- EXPLAIN (ANALYZE) capture for slow statements ---
+
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|INTO)\b", re.IGNORECASE)
+# Row locks and functions with side effects must not run a second time
+_LOCKING = re.compile(r"\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+_VOLATILE = re.compile(
+    r"\b(pg_export_snapshot|pg_(try_)?advisory\w*|nextval|setval|set_config|pg_sleep\w*|pg_notify"
+    r"|txid_current\w*|pg_current_xact_id\w*|pg_cancel_backend|pg_terminate_backend|dblink\w*)\s*\(",
+    re.IGNORECASE,
+)
+_DOLLAR_PARAM = re.compile(r"\$(\d+)")
+_explain_queue = queue.Queue(maxsize=20)
+_explain_thread = None
+
+
+def _as_pyformat(statement, parameters, paramstyle):
+    """Rewrite an asyncpg ($1) statement so the psycopg2 engine can run it."""
+    if paramstyle != "numeric_dollar":
+        return statement, parameters
+    values = list(parameters or ())
+    ordered = []
+
+    def replace(match):
+        ordered.append(values[int(match.group(1)) - 1])
+        return "%s"
+
+    statement = _DOLLAR_PARAM.sub(replace, statement.replace("%", "%%"))
+    return statement, tuple(ordered)
+
+
+def _queue_explain(entry, pool_name, statement, parameters, paramstyle):
+    global _explain_thread
+    if not _READ_ONLY.match(statement) or _WRITES.search(statement):
+        return
+    if _LOCKING.search(statement) or _VOLATILE.search(statement):
+        return
+    # Only the app's own engines; migrate/restore/worker-lock engines may point at other databases
+    if pool_name not in ("primary", "primary_async", "replica", "replica_async"):
+        return
+    try:
+        _explain_queue.put_nowait((entry, pool_name, *_as_pyformat(statement, parameters, paramstyle)))
+    except queue.Full:
+        return
+    with _lock:
+        if _explain_thread is None:
+            _explain_thread = threading.Thread(target=_explain_worker, name="sql-explain", daemon=True)
+            _explain_thread.start()
+
+
+def _explain_worker():
+    from inventory_backend.database import engine, read_engine
+
+    _explaining.set(True)
+    while True:
+        entry, pool_name, statement, parameters = _explain_queue.get()
+        # Same database the statement ran on: the sync engine for the replica or the primary
+        bind = read_engine if pool_name.startswith("replica") else engine
+        try:
+            with bind.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    plan = conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, parameters
+                    ).fetchall()
+                finally:
+                    trans.rollback()
+            entry["plan"] = "\n".join(row[0] for row in plan)
+        except Exception as e:
+            entry["plan_error"] = str(e)
+
+
+# --- Request attribution ---
+
+class QueryContextMiddleware:
+    """Labels SQL with the route template and reports per-request statement count/time in headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        label = f"{scope['method']} {route_template(scope)}"
+        with sql_context(label) as ctx:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", []).extend([
+                        (b"x-db-statements", str(ctx.statements).encode()),
+                        (b"x-db-time-ms", f"{ctx.seconds * 1000:.1f}".encode()),
+                    ])
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+
+def context_histograms():
+    with _lock:
+        return [((label,), h) for label, h in _by_context.items()]
+
+
+def sql_stats(top=25):
+    with _lock:
+        statements = sorted(_statements.items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:top]
+        contexts = {
+            label: {
+                "count": h.count,
+                "total_ms": round(h.sum * 1000, 1),
+                "p50_ms": h.quantile(0.5) * 1000,
+                "p95_ms": h.quantile(0.95) * 1000,
+                "p99_ms": h.quantile(0.99) * 1000,
+            }
+            for label, h in _by_context.items()
+        }
+        return {
+            "statements": [
+                {
+                    "statement": key[:500],
+                    "calls": s["calls"],
+                    "total_ms": round(s["total_s"] * 1000, 1),
+                    "avg_ms": round(s["total_s"] / s["calls"] * 1000, 3),
+                    "max_ms": round(s["max_s"] * 1000, 1),
+                    "rows": s["rows"],
+                    "contexts": sorted(s["contexts"]),
+                }
+                for key, s in statements
+            ],
+            "contexts": contexts,
+            "slow_queries": list(slow_log),
+        }
@@ -0,0 +1,55 @@
+import os
+import re
+from mimetypes import guess_type
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from fastapi.staticfiles import StaticFiles
+
+# Vite emits content-hashed names such as assets/index-BqXy12_a.js, and only into assets/; files
+# copied from public/ (favicon-32x32.png, app-settings.json) keep their names and can change in place
+HASHED_ASSETS_DIR = "assets"
+HASHED_FILENAME = re.compile(r"-[A-Za-z0-9_-]{8}\.(js|css|woff2?|png|svg|jpg|webp)$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br/.gz siblings built by Vite and caches hashed assets forever."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        response = self._precompressed_response(full_path, request_headers, status_code)
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        elif self.is_not_modified(response.headers, request_headers):
+            response = NotModifiedResponse(response.headers)
+
+        if self._is_hashed_asset(full_path):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def _is_hashed_asset(self, full_path):
+        relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        return relative.startswith(HASHED_ASSETS_DIR + "/") and bool(HASHED_FILENAME.search(relative))
+
+    def _precompressed_response(self, full_path, request_headers, status_code):
+        accepted = request_headers.get("accept-encoding", "")
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            return FileResponse(
+                full_path + suffix,
+                status_code=status_code,
+                stat_result=compressed_stat,
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+        return None
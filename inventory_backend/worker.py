@@ -0,0 +1,162 @@
+"""Scheduled-job worker.
+
+    python -m inventory_backend.worker
+
+Runs every scheduled job (Veeqo sync, backups, nightly maintenance) outside the API, so uvicorn
+processes only serve requests and can scale to several workers. Run one per deployment; a second
+copy waits on the scheduler lock and takes over when the first exits. Each run is recorded in
+scheduler_jobs and the worker heartbeats into worker_heartbeats; /metrics on the API reads both.
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import logging
+import functools
+from datetime import datetime
+import pytz
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from inventory_backend.database import DATABASE_URL, engine
+from inventory_backend.logging_config import setup_logging
+from inventory_backend.dashboard.sync_logic import sync_veeqo_orders_job
+from inventory_backend.dashboard.backup import run_backup, has_backup_today
+from inventory_backend.dashboard.partitions import maintain_inventory_log_partitions
+from inventory_backend.dashboard.unit_archive import archive_sold_units
+
+logger = logging.getLogger(__name__)
+
+# Held for the life of whichever process runs the scheduler (this worker, or the API when RUN_SCHEDULER is set)
+SCHEDULER_LOCK_KEY = 7_340_002
+HEARTBEAT_SECONDS = int(os.getenv("WORKER_HEARTBEAT_SECONDS", "30"))
+# Take a backup right away on startup when none exists for today yet
+STARTUP_BACKUP = os.getenv("STARTUP_BACKUP", "1") == "1"
+
+TIMEZONE = pytz.timezone("America/Los_Angeles")
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+# (job name, function, trigger)
+JOBS = [
+    ("sync_veeqo_orders", sync_veeqo_orders_job, IntervalTrigger(minutes=1)),
+    ("run_backup", run_backup, CronTrigger(hour=16, minute=0)),
+    ("inventory_log_partitions", maintain_inventory_log_partitions, CronTrigger(hour=2, minute=15)),
+    ("archive_sold_units", archive_sold_units, CronTrigger(hour=2, minute=45)),
+]
+
+
+def _record_start(name):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO scheduler_jobs (job_name, last_status, last_started_at, worker_id)
+            VALUES (:name, 'running', now(), :worker)
+            ON CONFLICT (job_name) DO UPDATE
+            SET last_status = 'running', last_started_at = now(), worker_id = EXCLUDED.worker_id
+        """), {"name": name, "worker": WORKER_ID})
+
+
+def _record_finish(name, seconds, error):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE scheduler_jobs
+            SET last_status = CASE WHEN CAST(:error AS text) IS NULL THEN 'ok' ELSE 'failed' END,
+                last_finished_at = now(),
+                last_success_at = CASE WHEN CAST(:error AS text) IS NULL THEN now() ELSE last_success_at END,
+                last_duration_s = :seconds,
+                last_error = :error,
+                run_count = run_count + 1,
+                failure_count = failure_count + CASE WHEN CAST(:error AS text) IS NULL THEN 0 ELSE 1 END
+            WHERE job_name = :name
+        """), {"name": name, "seconds": seconds, "error": error})
+
+
+def tracked(name, fn):
+    """Wrap a job so each run's start, outcome and duration land in scheduler_jobs."""
+    @functools.wraps(fn)
+    def run():
+        try:
+            _record_start(name)
+        except Exception:
+            logger.exception("Could not record start of job %s", name)
+        start = time.perf_counter()
+        error = None
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:2000]
+            raise
+        finally:
+            try:
+                _record_finish(name, time.perf_counter() - start, error)
+            except Exception:
+                logger.exception("Could not record end of job %s", name)
+    return run
+
+
+def add_jobs(scheduler):
+    for name, fn, trigger in JOBS:
+        scheduler.add_job(tracked(name, fn), trigger, id=name, name=name)
+    if STARTUP_BACKUP and not has_backup_today():
+        scheduler.add_job(tracked("run_backup", run_backup), id="startup_backup", next_run_time=datetime.now(TIMEZONE))
+
+
+def scheduler_lock_connection(wait):
+    """Dedicated connection holding the scheduler advisory lock, or None if `wait` is False and it is taken."""
+    conn = create_engine(DATABASE_URL, poolclass=NullPool).connect()
+    if wait:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+    elif not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}).scalar():
+        conn.close()
+        return None
+    conn.commit()
+    return conn
+
+
+def main():
+    # A standby worker waiting on the lock runs alongside the active one
+    setup_logging(log_file="worker.log", per_process=True)
+
+    logger.info("Worker %s waiting for the scheduler lock", WORKER_ID)
+    lock_conn = scheduler_lock_connection(wait=True)
+    started_at = datetime.now(TIMEZONE)
+
+    scheduler = BlockingScheduler(timezone=TIMEZONE)
+    lost_lock = []
+
+    def heartbeat():
+        # Written on the lock connection: if it has dropped, so has the lock, and this worker must stop
+        try:
+            lock_conn.execute(text("""
+                INSERT INTO worker_heartbeats (worker_id, hostname, pid, started_at, last_seen_at)
+                VALUES (:worker, :host, :pid, :started, now())
+                ON CONFLICT (worker_id) DO UPDATE SET last_seen_at = now()
+            """), {"worker": WORKER_ID, "host": socket.gethostname(), "pid": os.getpid(), "started": started_at})
+            lock_conn.execute(text("DELETE FROM worker_heartbeats WHERE last_seen_at < now() - interval '1 day'"))
+            lock_conn.commit()
+        except Exception:
+            logger.exception("Lost the scheduler lock connection; stopping")
+            lost_lock.append(True)
+            if scheduler.running:
+                scheduler.shutdown(wait=False)
+
+    heartbeat()
+    if lost_lock:
+        return 1
+    add_jobs(scheduler)
+    scheduler.add_job(heartbeat, IntervalTrigger(seconds=HEARTBEAT_SECONDS), id="heartbeat")
+    logger.info("Worker %s running jobs: %s", WORKER_ID, ", ".join(name for name, _, _ in JOBS))
+
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        lock_conn.close()
+    return 1 if lost_lock else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
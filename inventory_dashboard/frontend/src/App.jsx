@@ -19,9 +19,7 @@ function App() {
   const [expandedOrders, setExpandedOrders] = useState(new Set());
 
   useEffect(() => {
-  fetchData();
-  fetchInventoryLog();
-  fetchManualCheckItems();
+  fetchBootstrap();
 
   const interval = setInterval(() => {
     if (document.visibilityState === "visible") {
@@ -52,6 +50,39 @@ function App() {
     return Object.values(grouped);
   };
 
+  const groupInventoryLog = (data) => {
+    const sevenDaysAgo = new Date();
+    sevenDaysAgo.setDate(sevenDaysAgo.getDate() - 7);
+
+    const grouped = {};
+    for (const entry of data) {
+      const eventTime = new Date(entry.event_time);
+      if (eventTime >= sevenDaysAgo) {
+        const id = entry.order_id ?? "unknown";
+        if (!grouped[id]) grouped[id] = [];
+        grouped[id].push(entry);
+      }
+    }
+
+    return grouped;
+  };
+
+  // Initial load: one round trip for products, log and manual checks
+  const fetchBootstrap = async () => {
+    setLoading(true);
+    try {
+      const res = await fetch(`${API_HOST}/dashboard/bootstrap`);
+      const data = await res.json();
+      setProducts(groupByMasterSku(data.grouped_products));
+      setLog(groupInventoryLog(data.inventory_log));
+      setManualCheckItems(data.manual_check);
+    } catch (err) {
+      console.error("❌ Error fetching dashboard bootstrap", err);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const fetchData = async () => {
     setLoading(true);
     try {
@@ -70,26 +101,30 @@ function App() {
     try {
       const res = await fetch(`${import.meta.env.VITE_API_HOST}/dashboard/inventory-log`);
       const data = await res.json();
-
-      const sevenDaysAgo = new Date();
-      sevenDaysAgo.setDate(sevenDaysAgo.getDate() - 7);
-
-      const grouped = {};
-      for (const entry of data) {
-        const eventTime = new Date(entry.event_time);
-        if (eventTime >= sevenDaysAgo) {
-          const id = entry.order_id ?? "unknown";
-          if (!grouped[id]) grouped[id] = [];
-          grouped[id].push(entry);
-        }
-      }
-
-      setLog(grouped);
+      setLog(groupInventoryLog(data));
     } catch (err) {
       console.error("❌ Failed to load inventory log", err);
     }
   };
 
+  // One grouped request for many master SKUs ("all" by default); the browser
+  // revalidates it with the ETag, so repeat loads are a 304.
+  const fetchSkuBreakdowns = async (masterSkuIds = "all") => {
+    try {
+      const ids = Array.isArray(masterSkuIds) ? masterSkuIds.map(encodeURIComponent).join(",") : masterSkuIds;
+      const res = await fetch(`${API_HOST}/dashboard/sku-breakdowns?master_sku_ids=${ids}`);
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      const data = await res.json();
+      // SKUs with no breakdown rows are left out of the response; cache them as empty so
+      // expanding them again doesn't re-fetch
+      const requested = Array.isArray(masterSkuIds) ? masterSkuIds : products.map((p) => p.master_sku_id);
+      const empty = Object.fromEntries(requested.map((id) => [id, []]));
+      setSkuBreakdowns(prev => ({ ...prev, ...empty, ...data }));
+    } catch (err) {
+      console.error("❌ Error fetching breakdowns", err);
+    }
+  };
+
   const toggleSkuBreakdown = async (masterSkuId) => {
     const newSet = new Set(expandedSkus);
     if (expandedSkus.has(masterSkuId)) {
@@ -97,18 +132,21 @@ function App() {
     } else {
       newSet.add(masterSkuId);
       if (!skuBreakdowns[masterSkuId]) {
-        try {
-          const res = await fetch(`${API_HOST}/dashboard/sku-breakdown?master_sku_id=${masterSkuId}`);
-          const data = await res.json();
-          setSkuBreakdowns(prev => ({ ...prev, [masterSkuId]: data }));
-        } catch (err) {
-          console.error("❌ Error fetching breakdown", err);
-        }
+        await fetchSkuBreakdowns();
       }
     }
     setExpandedSkus(newSet);
   };
 
+  const toggleAllSkuBreakdowns = async () => {
+    if (expandedSkus.size > 0) {
+      setExpandedSkus(new Set());
+      return;
+    }
+    await fetchSkuBreakdowns();
+    setExpandedSkus(new Set(products.map((p) => p.master_sku_id)));
+  };
+
 
   const fetchManualCheckItems = async () => {
     try {
@@ -193,8 +231,15 @@ function App() {
           </button>
         </div>
 
-        {/* Right side: CSV download button (warehouse only) */}
+        {/* Right side: expand toggle + CSV download button (warehouse only) */}
         {activeTab === "warehouse" && (
+          <div className="flex gap-2">
+          <button
+            onClick={toggleAllSkuBreakdowns}
+            className="bg-gray-200 text-gray-700 px-4 py-2 rounded hover:bg-gray-300"
+          >
+            {expandedSkus.size > 0 ? "Collapse All" : "Expand All"}
+          </button>
           <button
             onClick={downloadCSV}
             className="bg-blue-600 text-white px-4 py-2 rounded hover:bg-blue-700 flex items-center gap-2"
@@ -202,6 +247,7 @@ function App() {
             <ArrowDownTrayIcon className="h-5 w-5 text-white" />
             Download CSV
           </button>
+          </div>
         )}
       </div>
 
@@ -303,9 +349,7 @@ function App() {
                                         body: JSON.stringify({ product_id: item.product_id, price: val })
                                       });
 
-                                      const res = await fetch(`${API_HOST}/dashboard/sku-breakdown?master_sku_id=${row.master_sku_id}`);
-                                      const data = await res.json();
-                                      setSkuBreakdowns(prev => ({ ...prev, [row.master_sku_id]: data }));
+                                      await fetchSkuBreakdowns([row.master_sku_id]);
                                     }
                                   }}
                                 >
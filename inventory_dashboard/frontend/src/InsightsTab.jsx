@@ -8,18 +8,33 @@ function InsightsTab() {
   const [loading, setLoading] = useState(false);
   const [hasSearched, setHasSearched] = useState(false);
   const [error, setError] = useState("");
+  const [suggestions, setSuggestions] = useState([]);
+  const [timeline, setTimeline] = useState([]);
+  const [receivedTimeRecorded, setReceivedTimeRecorded] = useState(true);
 
-  const handleSearch = async () => {
-    if (!lookupValue.trim()) return;
+  const fetchSuggestions = async (value) => {
+    if (value.trim().length < 3) return [];
+    const res = await fetch(
+      `${import.meta.env.VITE_API_HOST}/dashboard/insights/search?q=${encodeURIComponent(value)}`
+    );
+    if (!res.ok) return [];
+    const data = await res.json();
+    return data.results ?? [];
+  };
+
+  const handleSearch = async (value = lookupValue) => {
+    if (!value.trim()) return;
     setHasSearched(true);
     setLoading(true);
     setPoResults([]);
     setUnitResult(null);
+    setSuggestions([]);
+    setTimeline([]);
     setError("");
     try {
       const poRes = await fetch(
         `${import.meta.env.VITE_API_HOST}/dashboard/insights/po-details?po_number=${encodeURIComponent(
-          lookupValue
+          value
         )}`
       );
       const poData = await poRes.json();
@@ -31,15 +46,28 @@ function InsightsTab() {
 
       const snRes = await fetch(
         `${import.meta.env.VITE_API_HOST}/dashboard/insights/unit-details?serial_number=${encodeURIComponent(
-          lookupValue
+          value
         )}`
       );
 
       if (!snRes.ok) throw new Error("Not found");
       const snData = await snRes.json();
       setUnitResult(snData);
+
+      const tlRes = await fetch(
+        `${import.meta.env.VITE_API_HOST}/dashboard/insights/unit-timeline?serial_number=${encodeURIComponent(
+          value
+        )}`
+      );
+      if (tlRes.ok) {
+        const tlData = await tlRes.json();
+        setTimeline(tlData.events ?? []);
+        setReceivedTimeRecorded(tlData.received_time_recorded ?? true);
+      }
     } catch (err) {
-      setError(`No results found for: ${lookupValue}`);
+      const matches = await fetchSuggestions(value).catch(() => []);
+      setSuggestions(matches);
+      setError(`No exact results found for: ${value}`);
     } finally {
       setLoading(false);
     }
@@ -64,7 +92,7 @@ function InsightsTab() {
           className="border px-3 py-2 rounded w-80"
         />
         <button
-          onClick={handleSearch}
+          onClick={() => handleSearch()}
           className="bg-blue-600 text-white px-4 py-2 rounded"
         >
           Search
@@ -74,8 +102,34 @@ function InsightsTab() {
       {loading ? (
         <p className="text-gray-600">Loading...</p>
       ) : error ? (
-        <p className="text-red-500">{error}</p>
+        <div>
+          <p className="text-red-500">{error}</p>
+          {suggestions.length > 0 && (
+            <div className="mt-3">
+              <p className="text-gray-600 mb-1">Did you mean:</p>
+              <ul className="text-sm">
+                {suggestions.map((s) => (
+                  <li key={`${s.kind}-${s.value}`}>
+                    <button
+                      onClick={() => {
+                        setLookupValue(s.value);
+                        handleSearch(s.value);
+                      }}
+                      className="text-blue-600 hover:underline font-mono"
+                    >
+                      {s.value}
+                    </button>
+                    <span className="text-gray-500 ml-2">
+                      {s.kind} · {s.sources.join(", ")}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+        </div>
       ) : unitResult ? (
+        <div>
         <table className="w-full border border-gray-300">
           <thead className="bg-gray-100 text-left">
             <tr>
@@ -98,6 +152,46 @@ function InsightsTab() {
             </tr>
           </tbody>
         </table>
+        {timeline.length > 0 && (
+          <div className="mt-6">
+            <h3 className="font-semibold mb-2">Timeline</h3>
+            <table className="w-full border border-gray-300 text-sm">
+              <thead className="bg-gray-100 text-left">
+                <tr>
+                  <th className="border px-3 py-2">When</th>
+                  <th className="border px-3 py-2">Event</th>
+                  <th className="border px-3 py-2">Details</th>
+                </tr>
+              </thead>
+              <tbody>
+                {timeline.map((ev, idx) => (
+                  <tr key={idx}>
+                    <td className="border px-3 py-1 text-gray-600">
+                      {ev.event_time ? new Date(ev.event_time).toLocaleString() : "—"}
+                    </td>
+                    <td className="border px-3 py-1 font-semibold capitalize">{ev.event}</td>
+                    <td className="border px-3 py-1">
+                      {[
+                        ev.part_number,
+                        ev.new_part_number && `→ ${ev.new_part_number}`,
+                        ev.po_number && `PO ${ev.po_number}`,
+                        ev.order_id && `Order ${ev.order_id}`,
+                        ev.username && `by ${ev.username}`,
+                        ev.memo_number && `Memo ${ev.memo_number}`
+                      ].filter(Boolean).join(" · ")}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+            {!receivedTimeRecorded && (
+              <p className="mt-2 text-xs text-gray-500">
+                Receive time was not recorded for this unit (added before receive times were tracked).
+              </p>
+            )}
+          </div>
+        )}
+        </div>
       ) : poResults.length > 0 ? (
         <table className="w-full border border-gray-300">
           <thead className="bg-gray-100 text-left">
@@ -1,10 +1,42 @@
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
+import { gzipSync, brotliCompressSync, constants } from 'zlib'
+import { readdirSync, readFileSync, writeFileSync, statSync } from 'fs'
+import { join, resolve } from 'path'
+
+// Writes .gz and .br next to each text asset so the backend can serve them as-is
+function precompress() {
+  let outDir = 'dist'
+  const compressible = /\.(js|css|html|svg|json)$/
+  const walk = (dir) => readdirSync(dir).flatMap((name) => {
+    const file = join(dir, name)
+    return statSync(file).isDirectory() ? walk(file) : [file]
+  })
+
+  return {
+    name: 'precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = resolve(config.root, config.build.outDir)
+    },
+    closeBundle() {
+      for (const file of walk(outDir)) {
+        if (!compressible.test(file)) continue
+        const source = readFileSync(file)
+        if (source.length < 1024) continue
+        writeFileSync(`${file}.gz`, gzipSync(source, { level: 9 }))
+        writeFileSync(`${file}.br`, brotliCompressSync(source, {
+          params: { [constants.BROTLI_PARAM_QUALITY]: 11 }
+        }))
+      }
+    }
+  }
+}
 
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
   server: {
     host: '0.0.0.0',     // ← Accept connections from any IP
     port: 5173
   }
-});
\ No newline at end of file
+});
@@ -256,4 +256,17 @@ def log_untracked_sale(product_id, order_id, quantity):
 def create_manual_order(payload):
     resp = requests.post(f"{API_BASE_URL}/manual-order", json=payload)
     resp.raise_for_status()
-    return resp.json()
\ No newline at end of file
+    return resp.json()
+
+
+def assign_serials(assignments, user_id):
+    """Assign a batch of (unit_id, serial) pairs in one request; the response has a result per item."""
+    try:
+        r = requests.post(f"{API_BASE_URL}/assign-serials", json={
+            "assignments": [{"unit_id": unit_id, "serial": serial} for unit_id, serial in assignments],
+            "user_id": user_id
+        }, timeout=30)
+        return r.json() if r.status_code == 200 else {"success": False, "detail": r.text, "results": []}
+    except Exception as e:
+        print("Error assigning serials:", e)
+        return {"success": False, "detail": str(e), "results": []}
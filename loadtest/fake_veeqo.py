@@ -0,0 +1,86 @@
+"""Local stand-in for the Veeqo /orders API.
+
+Every time the sync asks for page 1, a new batch of shipped orders is released, built from unsold
+serials in the load-test database. Earlier orders stay in the feed, as they do on the real API within
+the 7-day window, so the sync's "already processed" check is exercised as well.
+
+Point the backend at it with VEEQO_API_URL=http://127.0.0.1:<port>/orders.
+"""
+import json
+import random
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class OrderFeed:
+    def __init__(self, serials, orders_per_sync=5, max_units_per_order=2):
+        # serials: list of (serial_number, part_number) for unsold units
+        self._serials = list(serials)
+        random.shuffle(self._serials)
+        self.orders_per_sync = orders_per_sync
+        self.max_units_per_order = max_units_per_order
+        self.orders = []
+        self._lock = threading.Lock()
+
+    def release_batch(self):
+        with self._lock:
+            for _ in range(self.orders_per_sync):
+                units = [self._serials.pop() for _ in range(random.randint(1, self.max_units_per_order)) if self._serials]
+                if not units:
+                    break
+                self.orders.append(self._order(len(self.orders) + 1, units))
+
+    def _order(self, n, units):
+        quantities = {}
+        for _, part_number in units:
+            quantities[part_number] = quantities.get(part_number, 0) + 1
+        return {
+            "number": f"LT-{n:07d}",
+            "shipped_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "employee_notes": [{"text": serial} for serial, _ in units],
+            "allocations": [{
+                "line_items": [
+                    {"sellable": {"sku_code": part_number}, "quantity": qty}
+                    for part_number, qty in quantities.items()
+                ]
+            }],
+        }
+
+    def page(self, page, page_size):
+        if page == 1:
+            self.release_batch()
+        with self._lock:
+            start = (page - 1) * page_size
+            return self.orders[start:start + page_size]
+
+
+def make_handler(feed):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/orders":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            page_size = int(query.get("page_size", ["100"])[0])
+            body = json.dumps(feed.page(page, page_size)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(feed, host="127.0.0.1", port=8900):
+    """Start the fake API on a daemon thread; returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), make_handler(feed))
+    threading.Thread(target=server.serve_forever, name="fake-veeqo", daemon=True).start()
+    return server
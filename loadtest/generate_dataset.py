@@ -0,0 +1,365 @@
+"""Synthetic dataset generator for scale testing.
+
+    python -m loadtest.generate_dataset --units 5000000 --truncate
+
+Fills a database created from inventory_backend/example-schema.sql with realistic volumes:
+brands, categories, master SKUs, products (including +512GB/+1TB variants and SSD stock items),
+units across POs with NOSER placeholders, sold units with matching inventory_log rows, returns,
+repairs, disposals, reconciled items, manual review entries, and soft allocations. Rows are streamed
+through COPY in chunks, so memory stays flat and tens of millions of rows load in minutes.
+
+Load into a fresh schema, then run `python -m inventory_backend.migrate upgrade` so the index builds
+happen once over the full data. Output is deterministic for a given --seed.
+"""
+import io
+import os
+import csv
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from loadtest.run import LOCAL_HOSTS
+
+CHUNK_ROWS = 200_000
+
+# Generated tables in load order; (primary key, sequence) for resetting the ID sequence afterwards
+TABLES = {
+    "ssds": ("ssd_id", "ssds_ssd_id_seq"),
+    "brands": ("brand_id", "brands_brand_id_seq"),
+    "categories": ("category_id", "categories_category_id_seq"),
+    "master_skus": (None, None),
+    "products": ("product_id", "products_product_id_seq"),
+    "users": ("user_id", "users_user_id_seq"),
+    "inventory_units": ("unit_id", "inventory_units_unit_id_seq"),
+    "inventory_log": ("log_id", "inventory_log_log_id_seq"),
+    "returns": ("return_id", "returns_return_id_seq"),
+    "repairs": ("repair_id", "repairs_repair_id_seq"),
+    "disposals": ("disposal_id", "disposals_disposal_id_seq"),
+    "reconciled_items": ("reconciled_id", "reconciled_items_reconciled_id_seq"),
+    "manual_review": ("review_id", "manual_review_review_id_seq"),
+    "untracked_serial_sales": ("id", "untracked_serial_sales_id_seq"),
+}
+
+CATEGORY_NAMES = ["Laptop", "Desktop", "Monitor", "Tablet", "Phone", "Docking Station", "Keyboard",
+                  "Mouse", "Headset", "Printer", "Networking", "SSD"]
+
+
+class CopyWriter:
+    """Buffers CSV rows for one table and COPYs them in CHUNK_ROWS batches."""
+
+    def __init__(self, cursor, table, columns):
+        self.cursor = cursor
+        self.sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        self.table = table
+        self.rows = 0
+        self._pending = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._pending += 1
+        if self._pending >= CHUNK_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._buffer.seek(0)
+            self.cursor.copy_expert(self.sql, self._buffer)
+            self.rows += self._pending
+            self._pending = 0
+            self._buffer = io.StringIO()
+            self._writer = csv.writer(self._buffer)
+
+
+def _columns(cursor, table):
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = 'public' AND table_name = %s",
+        (table,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _ts(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate(cursor, args, rng):
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=args.days)
+    span = (now - start).total_seconds()
+    writers = {}
+
+    def writer(table, columns):
+        writers[table] = CopyWriter(cursor, table, columns)
+        return writers[table]
+
+    # --- Reference data ---
+    w = writer("ssds", ["ssd_id", "label"])
+    w.write([1, "512GB"])
+    w.write([2, "1TB"])
+    w.flush()
+
+    w = writer("brands", ["brand_id", "brand_name"])
+    for b in range(1, args.brands + 1):
+        w.write([b, f"Brand {b:03d}"])
+    w.flush()
+
+    w = writer("categories", ["category_id", "name"])
+    categories = [CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f"Category {i + 1}" for i in range(args.categories)]
+    for i, name in enumerate(categories, start=1):
+        w.write([i, name])
+    w.flush()
+    ssd_category = categories.index("SSD") + 1 if "SSD" in categories else 1
+
+    with_price = "price" in _columns(cursor, "products")
+    product_columns = ["product_id", "master_sku_id", "part_number", "product_name", "category_id", "brand", "ssd_id"]
+    if with_price:
+        product_columns.append("price")
+
+    w_msku = writer("master_skus", ["master_sku_id", "description", "created_at"])
+    w_prod = writer("products", product_columns)
+    products = []  # (product_id, part_number, master_sku_id)
+    by_msku = {}
+    product_id = 0
+
+    def add_product(msku, part_number, name, category, brand, ssd_id):
+        nonlocal product_id
+        product_id += 1
+        row = [product_id, msku, part_number, name, category, brand, ssd_id if ssd_id else ""]
+        if with_price:
+            row.append(round(rng.uniform(40, 2400), 2))
+        w_prod.write(row)
+        products.append((product_id, part_number, msku))
+        by_msku.setdefault(msku, []).append(product_id)
+        return product_id
+
+    for m in range(1, args.master_skus + 1):
+        msku = f"MSK{m:06d}"
+        category = rng.randint(1, args.categories)
+        brand = rng.randint(1, args.brands)
+        w_msku.write([msku, f"{categories[category - 1]} model {m}", _ts(start + timedelta(seconds=rng.uniform(0, span / 2)))])
+        variants = [""] + [f"-{c}" for c in "ABCDEFGH"[: max(0, args.products_per_sku - 1)]]
+        for v in variants:
+            add_product(msku, f"{msku}{v}", f"{categories[category - 1]} {m}{v}", category, brand, None)
+        if rng.random() < args.ssd_variant_fraction:
+            add_product(msku, f"{msku}+512GB", f"{categories[category - 1]} {m} +512GB", category, brand, None)
+            add_product(msku, f"{msku}+1TB", f"{categories[category - 1]} {m} +1TB", category, brand, None)
+
+    # SSD stock items that the sync allocates (products.ssd_id)
+    ssd_products = []
+    for ssd_id, label in ((1, "512GB"), (2, "1TB")):
+        msku = f"SSD-{label}"
+        w_msku.write([msku, f"SSD {label}", _ts(start)])
+        for b in range(1, min(args.brands, 4) + 1):
+            ssd_products.append(add_product(msku, f"SSD-{label}-B{b}", f"SSD {label} brand {b}", ssd_category, b, ssd_id))
+    w_msku.flush()
+    w_prod.flush()
+
+    w = writer("users", ["user_id", "username", "password_hash", "is_admin"])
+    from inventory_backend.security import pwd_context
+    password_hash = pwd_context.hash(args.user_password)
+    for u in range(1, args.users + 1):
+        w.write([u, f"user{u:03d}", password_hash, "true" if u == 1 else "false"])
+    w.flush()
+
+    # --- Units and their histories ---
+    # Popular products get most of the stock (Pareto weights)
+    weights = [rng.paretovariate(1.2) for _ in products]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    w_units = writer("inventory_units", ["unit_id", "product_id", "serial_number", "serial_assigned_at",
+                                         "assigned_by_user_id", "po_number", "sn_prefix", "sold", "is_damaged"])
+    w_log = writer("inventory_log", ["log_id", "sku", "serial_number", "order_id", "event_time"])
+    w_ret = writer("returns", ["return_id", "original_unit_id", "product_id", "serial_number", "serial_assigned_at",
+                               "assigned_by_user_id", "po_number", "sn_prefix", "sold", "return_date"])
+    w_rep = writer("repairs", ["repair_id", "unit_id", "old_product_id", "new_product_id", "repaired_at"])
+    w_disp = writer("disposals", ["disposal_id", "unit_id", "original_product_id", "disposed_at"])
+
+    log_id = return_id = repair_id = disposal_id = order_seq = 0
+    po_seq, po_left, po_product = 0, 0, None
+    noser_start = int(args.units * (1 - args.noser_fraction * 5))
+    recent_cutoff = now - timedelta(days=14)
+    order_ids = []
+
+    for unit_id in range(1, args.units + 1):
+        # Deliveries arrive as POs of 20-500 units, mostly of one product
+        if po_left == 0:
+            po_seq += 1
+            po_left = rng.randint(20, 500)
+            po_product = products[_pick(cumulative, total, rng)]
+            po_prefix = "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(2)) \
+                if rng.random() < 0.3 else ""
+        po_left -= 1
+        pid, part_number, msku = po_product if rng.random() < 0.9 else products[_pick(cumulative, total, rng)]
+
+        assigned_at = start + timedelta(seconds=span * unit_id / args.units)
+        user_id = rng.randint(1, args.users)
+        po_number = f"PO{po_seq:07d}"
+
+        if unit_id >= noser_start and rng.random() < 0.2:
+            w_units.write([unit_id, pid, "NOSER", _ts(assigned_at), user_id, po_number, po_prefix, "false", "false"])
+            continue
+
+        serial = f"{po_prefix}{unit_id:010d}"
+        sold_chance = args.sold_fraction if assigned_at < recent_cutoff else args.sold_fraction / 4
+        sold = rng.random() < sold_chance
+        damaged = False
+        final_po = po_number
+        final_assigned = assigned_at
+
+        if sold:
+            sold_at = min(assigned_at + timedelta(hours=rng.uniform(2, 24 * 60)), now)
+            if order_ids and rng.random() < 0.15:
+                order_id = order_ids[-1]
+            else:
+                order_seq += 1
+                order_id = f"{100000000 + order_seq}"
+                order_ids.append(order_id)
+                if len(order_ids) > 1000:
+                    order_ids = order_ids[-100:]
+            log_id += 1
+            w_log.write([log_id, part_number, serial, order_id, _ts(sold_at)])
+
+            if rng.random() < args.return_fraction:
+                # Returned: snapshot into returns, unit goes back on the shelf under PO RETURN
+                returned_at = min(sold_at + timedelta(days=rng.uniform(1, 30)), now)
+                return_id += 1
+                w_ret.write([return_id, unit_id, pid, serial, _ts(assigned_at), user_id, po_number, po_prefix,
+                             "true", _ts(returned_at)])
+                sold, final_po, final_assigned = False, "RETURN", returned_at
+                damaged = rng.random() < 0.2
+        else:
+            damaged = rng.random() < args.damaged_fraction
+
+        if not sold and damaged and rng.random() < args.disposal_fraction / max(args.damaged_fraction, 1e-9):
+            disposal_id += 1
+            w_disp.write([disposal_id, unit_id, pid, _ts(min(final_assigned + timedelta(days=rng.uniform(1, 60)), now))])
+            sold = True
+        elif not sold and damaged and rng.random() < args.repair_fraction / max(args.damaged_fraction, 1e-9):
+            siblings = by_msku[msku]
+            new_pid = rng.choice(siblings)
+            repair_id += 1
+            w_rep.write([repair_id, unit_id, pid, new_pid, _ts(min(final_assigned + timedelta(days=rng.uniform(1, 30)), now))])
+            pid, damaged = new_pid, False
+
+        w_units.write([unit_id, pid, serial, _ts(final_assigned), user_id, final_po, po_prefix,
+                       "true" if sold else "false", "true" if damaged else "false"])
+
+    for table in ("inventory_units", "inventory_log", "returns", "repairs", "disposals"):
+        writers[table].flush()
+
+    # --- Review queues and soft allocations ---
+    w = writer("reconciled_items", ["reconciled_id", "product_id", "serial_number", "memo_number", "reconciled_at", "resolved"])
+    for r in range(1, args.reconciled + 1):
+        pid = products[_pick(cumulative, total, rng)][0]
+        w.write([r, pid, f"RC{r:010d}", f"MEMO{rng.randint(1, max(args.reconciled // 20, 1)):06d}",
+                 _ts(start + timedelta(seconds=rng.uniform(0, span))), "true" if rng.random() < 0.7 else "false"])
+    w.flush()
+
+    w = writer("manual_review", ["review_id", "order_id", "sku", "created_at", "resolved", "resolved_by_user_id"])
+    for r in range(1, args.manual_review + 1):
+        resolved = rng.random() < 0.85
+        w.write([r, f"{200000000 + r}", products[_pick(cumulative, total, rng)][1].lower(),
+                 _ts(start + timedelta(seconds=rng.uniform(0, span))),
+                 "true" if resolved else "false", rng.randint(1, args.users) if resolved else ""])
+    w.flush()
+
+    w = writer("untracked_serial_sales", ["id", "product_id", "order_id", "quantity", "created_at"])
+    for r in range(1, args.soft_allocations + 1):
+        w.write([r, rng.choice(ssd_products), f"{300000000 + r}", rng.randint(1, 2),
+                 _ts(now - timedelta(seconds=rng.uniform(0, span / 4)))])
+    w.flush()
+
+    return {table: w.rows for table, w in writers.items()}
+
+
+def _pick(cumulative, total, rng):
+    """Index into the weighted product list (binary search over cumulative weights)."""
+    target = rng.random() * total
+    lo, hi = 0, len(cumulative) - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if cumulative[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def main(argv=None):
+    load_dotenv(os.path.join(os.path.dirname(__file__), "..", "inventory_backend", ".env"))
+
+    parser = argparse.ArgumentParser(prog="python -m loadtest.generate_dataset", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--brands", type=int, default=40)
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--master-skus", type=int, default=3000)
+    parser.add_argument("--products-per-sku", type=int, default=3, help="colour/grade variants per master SKU")
+    parser.add_argument("--ssd-variant-fraction", type=float, default=0.3, help="master SKUs with +512GB/+1TB variants")
+    parser.add_argument("--units", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=1095, help="history span")
+    parser.add_argument("--sold-fraction", type=float, default=0.85)
+    parser.add_argument("--noser-fraction", type=float, default=0.01)
+    parser.add_argument("--return-fraction", type=float, default=0.04, help="of sold units")
+    parser.add_argument("--damaged-fraction", type=float, default=0.03, help="of unsold units")
+    parser.add_argument("--repair-fraction", type=float, default=0.01)
+    parser.add_argument("--disposal-fraction", type=float, default=0.005)
+    parser.add_argument("--reconciled", type=int, default=20_000)
+    parser.add_argument("--manual-review", type=int, default=10_000)
+    parser.add_argument("--soft-allocations", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=25)
+    parser.add_argument("--user-password", default="loadtest")
+    parser.add_argument("--truncate", action="store_true", help="empty the generated tables first")
+    parser.add_argument("--allow-remote", action="store_true", help="permit a non-local database")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set; pass --database-url")
+    if not args.allow_remote and urlparse(args.database_url).hostname not in LOCAL_HOSTS:
+        parser.error(f"{urlparse(args.database_url).hostname} is not local (use --allow-remote)")
+
+    engine = create_engine(args.database_url)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET statement_timeout = 0")
+        if args.truncate:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+        else:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM products) OR EXISTS (SELECT 1 FROM inventory_units)")
+            if cursor.fetchone()[0]:
+                parser.error("Database is not empty; pass --truncate to replace its contents")
+
+        started = time.perf_counter()
+        counts = generate(cursor, args, random.Random(args.seed))
+
+        for table, (pk, sequence) in TABLES.items():
+            if sequence:
+                cursor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT MAX({pk}) FROM {table}), 0) + 1, false)")
+        raw.commit()
+
+        raw.autocommit = True
+        cursor.execute("ANALYZE")
+    finally:
+        raw.close()
+        engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    for table, rows in counts.items():
+        print(f"{table:<24}{rows:>14,}")
+    print(f"{sum(counts.values()):,} rows in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
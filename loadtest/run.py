@@ -0,0 +1,254 @@
+"""Load test for the scanner and dashboard APIs.
+
+    python -m loadtest.run --scanners 8 --dashboards 4 --duration 120
+
+Simulates scanner stations (add-delivery -> noser-units refresh -> assign-serial loop) and dashboards
+polling bootstrap/breakdowns while the Veeqo sync runs against a local fake. It reports throughput,
+p50/p95/p99 latency and DB statements per request for each endpoint.
+
+Writes real rows (units, serials, sales), so only run it against a disposable, seeded database.
+Start the backend with VEEQO_API_URL pointing at the fake, e.g. VEEQO_API_URL=http://127.0.0.1:8900/orders.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from urllib.parse import urlparse
+import requests
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from loadtest.fake_veeqo import OrderFeed, serve
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class Recorder:
+    """Per-endpoint latency samples plus the X-DB-* headers the backend attaches to each response."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, endpoint, seconds, response):
+        ok = response is not None and response.status_code < 400
+        statements = db_ms = None
+        if response is not None:
+            statements = response.headers.get("x-db-statements")
+            db_ms = response.headers.get("x-db-time-ms")
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((
+                seconds, ok,
+                int(statements) if statements is not None else None,
+                float(db_ms) if db_ms is not None else None,
+            ))
+
+    def summary(self, elapsed):
+        rows = []
+        with self._lock:
+            items = sorted(self.samples.items())
+        for endpoint, samples in items:
+            latencies = sorted(s[0] for s in samples)
+            statements = [s[2] for s in samples if s[2] is not None]
+            db_ms = [s[3] for s in samples if s[3] is not None]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(samples),
+                "errors": sum(1 for s in samples if not s[1]),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "db_statements_avg": round(sum(statements) / len(statements), 1) if statements else None,
+                "db_ms_avg": round(sum(db_ms) / len(db_ms), 1) if db_ms else None,
+            })
+        return rows
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Client:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.session = requests.Session()
+
+    def call(self, method, path, label=None, **kwargs):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+        except requests.RequestException:
+            pass
+        self.recorder.record(label or f"{method} {path}", time.perf_counter() - start, response)
+        return response
+
+
+def scanner_station(station, args, products, recorder, stop):
+    client = Client(args.base_url, recorder)
+    batch = 0
+    while not stop.is_set():
+        batch += 1
+        po_number = f"LT{station:02d}{batch:05d}{uuid.uuid4().hex[:4].upper()}"
+        client.call("POST", "/scanner/add-delivery", json={
+            "product_id": random.choice(products),
+            "quantity": random.randint(1, args.units_per_delivery),
+            "user_id": args.user_id,
+            "po_number": po_number,
+        })
+        think(args, stop)
+
+        response = client.call("GET", "/scanner/noser-units")
+        units = []
+        if response is not None and response.ok:
+            units = [u["unit_id"] for u in response.json() if u.get("po_number") == po_number]
+        think(args, stop)
+
+        for unit_id in units:
+            if stop.is_set():
+                break
+            client.call("POST", "/scanner/assign-serial", json={
+                "unit_id": unit_id,
+                "new_serial": f"LT{uuid.uuid4().hex[:12].upper()}",
+                "user_id": args.user_id,
+            })
+            think(args, stop)
+
+
+def dashboard(args, recorder, stop):
+    client = Client(args.base_url, recorder)
+    etag = None
+    while not stop.is_set():
+        client.call("GET", "/dashboard/bootstrap")
+        headers = {"If-None-Match": etag} if etag else {}
+        response = client.call("GET", "/dashboard/sku-breakdowns?master_sku_ids=all",
+                               label="GET /dashboard/sku-breakdowns", headers=headers)
+        if response is not None and response.headers.get("etag"):
+            etag = response.headers["etag"]
+        client.call("GET", "/dashboard/manual-check")
+        stop.wait(args.poll_interval)
+
+
+def sync_trigger(args, recorder, stop):
+    client = Client(args.base_url, recorder)
+    while not stop.wait(args.sync_interval):
+        client.call("POST", "/dashboard/sync-veeqo-orders")
+
+
+def think(args, stop):
+    if args.think_ms:
+        stop.wait(random.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+def load_fixtures(database_url, serial_limit):
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        products = conn.execute(text("SELECT product_id FROM products")).scalars().all()
+        serials = conn.execute(text("""
+            SELECT iu.serial_number, p.part_number
+            FROM inventory_units iu
+            JOIN products p ON iu.product_id = p.product_id
+            WHERE iu.sold = FALSE AND iu.serial_number != 'NOSER'
+            ORDER BY random()
+            LIMIT :n
+        """), {"n": serial_limit}).all()
+    engine.dispose()
+    return products, [tuple(s) for s in serials]
+
+
+def print_report(rows, elapsed):
+    header = f"{'endpoint':<42}{'reqs':>8}{'err':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'stmts':>7}{'db ms':>8}"
+    print(f"\nDuration {elapsed:.1f}s")
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['endpoint']:<42}{r['requests']:>8}{r['errors']:>6}{r['rps']:>8}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+            f"{r['db_statements_avg'] if r['db_statements_avg'] is not None else '-':>7}"
+            f"{r['db_ms_avg'] if r['db_ms_avg'] is not None else '-':>8}"
+        )
+    total = sum(r["requests"] for r in rows)
+    print(f"\nTotal {total} requests, {total / elapsed:.1f} req/s, {sum(r['errors'] for r in rows)} errors")
+
+
+def main(argv=None):
+    load_dotenv(os.path.join(os.path.dirname(__file__), "..", "inventory_backend", ".env"))
+
+    parser = argparse.ArgumentParser(prog="python -m loadtest.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--scanners", type=int, default=4, help="simulated scanner stations")
+    parser.add_argument("--dashboards", type=int, default=2, help="simulated dashboard tabs")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--think-ms", type=float, default=200, help="pause between scanner actions")
+    parser.add_argument("--units-per-delivery", type=int, default=5)
+    parser.add_argument("--poll-interval", type=float, default=5, help="dashboard refresh, seconds")
+    parser.add_argument("--sync-interval", type=float, default=15, help="seconds between sync triggers; 0 disables")
+    parser.add_argument("--orders-per-sync", type=int, default=10, help="orders the fake Veeqo releases per sync")
+    parser.add_argument("--serials", type=int, default=20000, help="unsold serials loaded into the fake order feed")
+    parser.add_argument("--veeqo-port", type=int, default=8900)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--allow-remote", action="store_true", help="permit a non-local API or database")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set; pass --database-url")
+    if not args.allow_remote:
+        for url in (args.base_url, args.database_url):
+            if urlparse(url).hostname not in LOCAL_HOSTS:
+                parser.error(f"{urlparse(url).hostname} is not local; this test writes data (use --allow-remote)")
+
+    products, serials = load_fixtures(args.database_url, args.serials)
+    if not products:
+        parser.error("No products found; seed the database first")
+
+    feed = OrderFeed(serials, orders_per_sync=args.orders_per_sync)
+    veeqo = serve(feed, port=args.veeqo_port)
+    print(f"Fake Veeqo on http://127.0.0.1:{args.veeqo_port}/orders with {len(serials)} sellable serials")
+
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=scanner_station, args=(i + 1, args, products, recorder, stop), daemon=True)
+        for i in range(args.scanners)
+    ]
+    threads += [threading.Thread(target=dashboard, args=(args, recorder, stop), daemon=True) for _ in range(args.dashboards)]
+    if args.sync_interval:
+        threads.append(threading.Thread(target=sync_trigger, args=(args, recorder, stop), daemon=True))
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    try:
+        stop.wait(args.duration)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for t in threads:
+        t.join(timeout=65)
+    elapsed = time.perf_counter() - start
+    veeqo.shutdown()
+
+    rows = recorder.summary(elapsed)
+    print_report(rows, elapsed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            settings = {k: v for k, v in vars(args).items() if k != "database_url"}
+            json.dump({"duration_s": elapsed, "args": settings, "endpoints": rows,
+                       "orders_released": len(feed.orders)}, f, indent=2, default=str)
+    return 1 if any(r["errors"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
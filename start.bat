@@ -2,5 +2,8 @@
 echo Starting Majool Inventory Backend...
 cd /d %~dp0
 call inventory_backend\env\Scripts\activate.bat
+rem API worker processes; /metrics is only served with 1 (its counters are per process)
+if not defined API_WORKERS set API_WORKERS=1
+start "Inventory Worker" python -m inventory_backend.worker
 python -m inventory_backend.main
 pause
\ No newline at end of file
@@ -0,0 +1,4 @@
+import os
+
+# database.py refuses to import without it; engines connect lazily, so unit tests never reach it
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/inventory_test")
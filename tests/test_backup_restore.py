@@ -0,0 +1,113 @@
+import os
+import csv
+import gzip
+import json
+import hashlib
+from datetime import datetime, timedelta
+import pytest
+from inventory_backend.dashboard.backup import BACKUP_TABLES, INVENTORY_LOG_ARCHIVE, MANIFEST, _dump_jobs
+from inventory_backend.restore import _expected_counts, resolve_chain, restore, verify_set
+
+LOG_COLUMNS = ["log_id", "sku", "serial_number", "order_id", "event_time", "updated_at"]
+JANUARY_SALE = [1, "SKU-A", "SN-1", "ORD-1", "2022-01-15 10:00:00", "2022-01-15 10:00:00+00"]
+RECENT_SALE = [2, "SKU-B", "SN-2", "ORD-2", "2025-06-01 10:00:00", "2025-06-01 10:00:00+00"]
+
+
+def write_set(root, name, kind, base, created_at, partitions, files):
+    """Write a backup set the way run_backup lays it out: gzip CSV per entry, manifest last."""
+    os.makedirs(os.path.join(root, name))
+    entries = []
+    for table, stem, entry_kind, columns, rows in files:
+        path = os.path.join(root, name, f"{stem}.csv.gz")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(columns)
+            writer.writerows(rows)
+        with open(path, "rb") as f:
+            data = f.read()
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+        entries.append({
+            "table": table, "kind": entry_kind, "file": os.path.basename(path),
+            "rows": len(rows), "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest(),
+        })
+    manifest = {
+        "name": name, "type": kind, "base": base, "monthly": False,
+        "created_at": created_at.isoformat(), "since": None, "until": created_at.isoformat(),
+        "compression": "gzip", "archive_partitions": partitions, "files": entries,
+    }
+    with open(os.path.join(root, name, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture
+def chain_root(tmp_path):
+    """A full set, then an incremental one taken after January 2022 moved to the archive."""
+    root = str(tmp_path)
+    day0 = datetime(2026, 1, 5, 16, 0)
+    write_set(root, "2026-01-05_160000_full", "full", None, day0, [], [
+        ("inventory_log", "inventory_log", "full", LOG_COLUMNS, [JANUARY_SALE, RECENT_SALE]),
+        (INVENTORY_LOG_ARCHIVE, INVENTORY_LOG_ARCHIVE, "full", LOG_COLUMNS, []),
+    ])
+    write_set(root, "2026-01-06_160000_incremental", "incremental", "2026-01-05_160000_full",
+              day0 + timedelta(days=1), ["inventory_log_2022_01"], [
+        ("inventory_log", "inventory_log", "delta", LOG_COLUMNS, []),
+        ("inventory_log", "inventory_log.keys", "keys", ["log_id"], [[2]]),
+        (INVENTORY_LOG_ARCHIVE, INVENTORY_LOG_ARCHIVE, "delta", LOG_COLUMNS, [JANUARY_SALE]),
+        (INVENTORY_LOG_ARCHIVE, f"{INVENTORY_LOG_ARCHIVE}.keys", "keys", ["log_id"], [[1]]),
+    ])
+    return root
+
+
+def test_incremental_set_lists_keys_for_every_tracked_table():
+    jobs = _dump_jobs("incremental", datetime(2026, 1, 5), [])
+    keyed = {table for table, _, kind, _, _ in jobs if kind == "keys"}
+    assert keyed == set(BACKUP_TABLES)
+
+
+def test_expected_counts_include_newly_archived_partition(chain_root):
+    chain = resolve_chain(root=chain_root)
+    assert [verify_set(m, chain_root) for m in chain] == [[], []]
+    expected = _expected_counts(chain)
+    assert expected["inventory_log"] == 1
+    assert expected[INVENTORY_LOG_ARCHIVE] == 1
+
+
+def test_expected_counts_for_sets_without_archive_keys(chain_root):
+    chain = resolve_chain(root=chain_root)
+    for manifest in chain:
+        manifest["files"] = [e for e in manifest["files"] if e["table"] != INVENTORY_LOG_ARCHIVE or e["kind"] != "keys"]
+    assert _expected_counts(chain)[INVENTORY_LOG_ARCHIVE] == 1
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (scratch database, superuser)")
+def test_restore_incremental_chain_with_new_archive_partition(chain_root):
+    from sqlalchemy import create_engine, text
+
+    url = os.environ["TEST_DATABASE_URL"]
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS archive CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS public.inventory_log CASCADE"))
+        conn.execute(text("CREATE SCHEMA archive"))
+        conn.execute(text("""
+            CREATE TABLE public.inventory_log (
+                log_id integer NOT NULL, sku text NOT NULL, serial_number text, order_id text,
+                event_time timestamp NOT NULL, updated_at timestamptz DEFAULT now()
+            ) PARTITION BY RANGE (event_time)
+        """))
+        conn.execute(text("CREATE TABLE public.inventory_log_default PARTITION OF public.inventory_log DEFAULT"))
+        conn.execute(text("""
+            CREATE TABLE archive.inventory_log_archive (LIKE public.inventory_log INCLUDING DEFAULTS)
+                PARTITION BY RANGE (event_time)
+        """))
+    engine.dispose()
+
+    stats, problems, _ = restore(resolve_chain(root=chain_root), url, chain_root, jobs=2)
+
+    assert problems == []
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT log_id FROM public.inventory_log")).scalars().all() == [2]
+        assert conn.execute(text("SELECT log_id FROM archive.inventory_log_archive")).scalars().all() == [1]
+    engine.dispose()
@@ -0,0 +1,31 @@
+from collections import namedtuple
+from decimal import Decimal
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from inventory_backend.dashboard.parquet_export import _column  # noqa: E402
+
+# The cursor.description fields _column reads (psycopg2 Column)
+Column = namedtuple("Column", "name type_code precision scale")
+NUMERIC = 1700
+
+
+def test_constrained_numeric_is_decimal():
+    arrow_type, convert = _column(Column("price", NUMERIC, 10, 2))
+    assert arrow_type == pa.decimal128(10, 2)
+    assert convert is None
+    assert pa.array([Decimal("1234.56")], type=arrow_type)[0].as_py() == Decimal("1234.56")
+
+
+@pytest.mark.parametrize("precision, scale", [(65535, 65531), (None, None)])
+def test_unconstrained_numeric_is_exact_text(precision, scale):
+    arrow_type, convert = _column(Column("price", NUMERIC, precision, scale))
+    assert arrow_type == pa.string()
+    assert convert(Decimal("12345678901234567890.123456789")) == "12345678901234567890.123456789"
+
+
+def test_numeric_wider_than_decimal128_is_exact_text():
+    arrow_type, convert = _column(Column("total", NUMERIC, 50, 4))
+    assert arrow_type == pa.string()
+    assert convert(Decimal("0.1000")) == "0.1000"
@@ -0,0 +1,27 @@
+import os
+import pytest
+from inventory_backend.static import PrecompressedStaticFiles, IMMUTABLE_CACHE
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    for name in ("assets/index-BqXy12_a.js", "app-settings.json", "logo-horizontal.svg", "favicon-32x32.png"):
+        (tmp_path / name).write_text("x")
+    return tmp_path
+
+
+def cache_control(dist, name):
+    static = PrecompressedStaticFiles(directory=str(dist))
+    path = os.path.join(str(dist), name)
+    scope = {"type": "http", "method": "GET", "headers": []}
+    return static.file_response(path, os.stat(path), scope).headers["Cache-Control"]
+
+
+def test_vite_hashed_asset_is_immutable(dist):
+    assert cache_control(dist, "assets/index-BqXy12_a.js") == IMMUTABLE_CACHE
+
+
+@pytest.mark.parametrize("name", ["app-settings.json", "logo-horizontal.svg", "favicon-32x32.png"])
+def test_dashed_name_without_hash_is_revalidated(dist, name):
+    assert cache_control(dist, name) == "no-cache"